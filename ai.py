@@ -1,33 +1,162 @@
+import hashlib
+import json
+import os
+import threading
 from openai import AzureOpenAI
 import streamlit as st
-import sqlite3
-import pandas as pd
-
-
-def get_teams_and_players():
-    # function to pull all teams together for the ai bot to have data
-    with sqlite3.connect("mlb.db") as conn:
-        query = """
-            SELECT
-                teams.name AS team_name,
-                players.name AS player_name
-            FROM teams
-            LEFT JOIN players ON teams.id = players.team_id
-            ORDER BY teams.name, players.name
-        """
-        df = pd.read_sql_query(query, conn)
-
-    # Convert DataFrame to a readable string
-    teams_and_players = ""
-    for _, row in df.iterrows():
-        teams_and_players += (
-            f"Team: {row['team_name']}, Player: {row['player_name']}\n"
+from connections import file_stamp
+from text_tokens import tokenize
+from chat_history import ChatHistory
+from intent_router import route
+from ttl_cache import TTLCache, MISSING
+from ump_tools import TOOLS, run_tool
+
+# Answers to questions asked before, so repeats skip the model
+ANSWER_CACHE_PATH = os.environ.get("ANSWER_CACHE_PATH", ".answer_cache.db")
+ANSWER_TTL = 24 * 3600
+ANSWER_CACHE_SIZE = 5000
+
+_answers = None
+_answers_lock = threading.Lock()
+
+# Rounds of tool calls the model gets before it must answer
+MAX_TOOL_ROUNDS = 4
+
+SYSTEM_PROMPT = (
+    "You are an AI Bot posed as an Umpire to answer a fan's questions on "
+    "the MLB and sport of baseball. It's 2025. Use the tools to look up "
+    "teams, rosters, jersey numbers and stadiums in our database instead "
+    "of guessing."
+)
+
+
+def get_answer_cache():
+    """Return the shared answer cache, opening it on first use."""
+    global _answers
+    with _answers_lock:
+        if _answers is None:
+            _answers = TTLCache(ANSWER_CACHE_PATH,
+                                max_entries=ANSWER_CACHE_SIZE)
+        return _answers
+
+
+def answer_key(question, data, model, conversation=()):
+    """
+    Cache key for a question: its words (case and punctuation don't
+    matter), the model, a hash of the data it was answered from (e.g.
+    the database's file stamp) and a hash of the conversation it was
+    asked in (the messages sent before it), so an answer is not reused
+    once the data behind it changes, nor for a follow-up like "who is
+    their catcher?" asked in another chat.
+    """
+    data_hash = hashlib.sha256(data.encode()).hexdigest()[:16]
+    chat_hash = hashlib.sha256(json.dumps(
+        list(conversation), sort_keys=True).encode()).hexdigest()[:16]
+    return f"{model}|{data_hash}|{chat_hash}|{' '.join(tokenize(question))}"
+
+
+def build_prompt(history, chat, model):
+    """
+    The messages sent to the model for the last question in chat (the
+    system prompt, then what history keeps of the chat) and the answer
+    cache key for them. No roster goes in the prompt, the model looks up
+    what it needs with the tools.
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages += history.prompt_messages(chat)
+    # everything sent before the question is part of the key
+    key = answer_key(chat[-1]["content"], repr(file_stamp()), model,
+                     messages[:-1])
+    return messages, key
+
+
+def _show_reply(reply):
+    st.session_state.messages.append({"role": "assistant", "content": reply})
+    with st.chat_message("assistant"):
+        st.markdown(f"🧑‍⚖️ Ump: {reply}")
+
+
+def stream_reply(response, tool_calls=None):
+    """
+    Yield the text of a streamed completion as each chunk arrives.
+    Tool calls, which arrive in pieces, are put together in the
+    tool_calls dict (by their index) when one is given.
+    """
+    for chunk in response:
+        # Azure sends chunks with no choices (e.g. content filter results)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        for part in getattr(delta, "tool_calls", None) or ():
+            call = tool_calls.setdefault(
+                part.index, {"id": "", "name": "", "arguments": ""})
+            if part.id:
+                call["id"] = part.id
+            if part.function is not None:
+                call["name"] += part.function.name or ""
+                call["arguments"] += part.function.arguments or ""
+        if delta.content:
+            yield delta.content
+
+
+def _tool_calls(message):
+    return {index: {"id": call.id, "name": call.function.name,
+                    "arguments": call.function.arguments}
+            for index, call in enumerate(
+                getattr(message, "tool_calls", None) or ())}
+
+
+def ask_model(client, model, messages, stream=False,
+              max_rounds=MAX_TOOL_ROUNDS):
+    """
+    Yield the text of the model's reply. When the model calls tools they
+    are run here against the database and their results sent back, for
+    up to max_rounds rounds; the last request does not offer tools so
+    the model has to answer.
+    """
+    messages = list(messages)
+    for round_number in range(max_rounds + 1):
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            tools=TOOLS,
+            tool_choice="auto" if round_number < max_rounds else "none",
+            stream=stream
         )
+        if stream:
+            calls = {}
+            yield from stream_reply(response, calls)
+        else:
+            message = response.choices[0].message
+            calls = _tool_calls(message)
+            if message.content:
+                yield message.content
+        if not calls:
+            return
 
-    return teams_and_players
+        calls = [calls[index] for index in sorted(calls)]
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {"id": call["id"], "type": "function",
+                 "function": {"name": call["name"],
+                              "arguments": call["arguments"]}}
+                for call in calls
+            ]
+        })
+        for call in calls:
+            messages.append({"role": "tool", "tool_call_id": call["id"],
+                             "content": run_tool(call["name"],
+                                                 call["arguments"])})
 
 
-def ai_bot(client=None):  # parameter is for testibility
+def ai_bot(client=None, stream=False):  # client is for testibility
+    """
+    The Ask the Ump chat. With stream the reply is written into its chat
+    bubble as it arrives instead of after the whole completion. The model
+    gets the database through the tools in ump_tools, not the prompt.
+    """
     if client is None:
         client = AzureOpenAI(
             api_key=st.secrets["OPENAI_API_KEY"],
@@ -37,6 +166,8 @@ def ai_bot(client=None):  # parameter is for testibility
 
     st.session_state.setdefault("openai_model", "gpt-35-turbo-16k")
     st.session_state.setdefault("messages", [])
+    # what the model is sent of a long chat: recent turns and a summary
+    st.session_state.setdefault("history", ChatHistory())
 
     # Display chat history
     for msg in st.session_state.messages:
@@ -61,25 +192,41 @@ def ai_bot(client=None):  # parameter is for testibility
         with st.chat_message("user"):
             st.markdown(f"**👨 Fan:** {prompt}")
 
-        system_message = {
-            "role": "system",
-            "content": (
-                "You are an AI Bot posed as an Umpire to answer a fan's "
-                "questions on the MLB and sport of baseball. It's 2025. "
-                "Here is the current list of teams and players:\n"
-                f"{get_teams_and_players()} USE THIS DATA"
-            )
-        }
+        # roster questions are answered from the database, no model call
+        answer = route(prompt)
+        if answer:
+            _show_reply(answer)
+            return
 
-        messages = [system_message] + st.session_state.messages
+        messages, key = build_prompt(st.session_state["history"],
+                                     st.session_state.messages,
+                                     st.session_state["openai_model"])
+        cache = get_answer_cache()
+        reply = cache.get(key)
+        if reply is not MISSING:
+            # asked before with the same data, no model call needed
+            _show_reply(reply)
+            return
 
-        response = client.chat.completions.create(
-            model=st.session_state["openai_model"],
-            messages=messages
-        )
+        reply_parts = ask_model(client, st.session_state["openai_model"],
+                                messages, stream=stream)
 
-        reply = response.choices[0].message.content
-        st.session_state.messages.append({"role": "assistant", "content":
-                                          reply})
-        with st.chat_message("assistant"):
-            st.markdown(f"🧑‍⚖️ Ump: {reply}")
+        if stream:
+            parts = []
+
+            def tokens():
+                yield "🧑‍⚖️ Ump: "
+                for text in reply_parts:
+                    parts.append(text)
+                    yield text
+
+            with st.chat_message("assistant"):
+                st.write_stream(tokens())
+            reply = "".join(parts)
+            st.session_state.messages.append({"role": "assistant",
+                                              "content": reply})
+        else:
+            reply = "".join(reply_parts)
+            _show_reply(reply)
+        if reply:
+            cache.set(key, reply, ANSWER_TTL)
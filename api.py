@@ -1,18 +1,70 @@
+import os
+import threading
 import requests
+import http_client
+from ttl_cache import TTLCache, MISSING
 
 # API URL for TheSportsDB API
 API_URL = "https://www.thesportsdb.com/api/v1/json/3"
 
-
-def get_player_info(player_name):
-    """Get minimal player information."""
+# Responses are kept on disk so Streamlit reruns don't call the API again
+API_CACHE_PATH = os.environ.get("API_CACHE_PATH", ".api_cache.db")
+# Seconds each endpoint's answers stay fresh
+CACHE_TTLS = {
+    "searchplayers.php?p=": 7 * 24 * 3600,
+    "lookupformerteams.php?id=": 24 * 3600,
+    "lookuphonours.php?id=": 24 * 3600,
+}
+# "Not found" answers are kept for less time in case the data is added
+NOT_FOUND_TTL = 6 * 3600
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the shared response cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTLCache(API_CACHE_PATH)
+        return _cache
+
+
+def _get_json(ext, query, result_key, refresh=False):
+    """
+    Fetch an endpoint through the cache. Empty results are cached with
+    NOT_FOUND_TTL, request errors are raised and never cached. With
+    refresh the API is always called and its answer replaces the cached
+    one.
+    """
+    url = f"{API_URL}/{ext}{query}"
+    cache = get_cache()
+    data = MISSING if refresh else cache.get(url)
+    if data is not MISSING:
+        return data
+
+    response = http_client.get(url)
+    response.raise_for_status()
+    data = response.json()
+
+    ttl = CACHE_TTLS[ext] if data.get(result_key) else NOT_FOUND_TTL
+    cache.set(url, data, ttl)
+    return data
+
+
+def get_player_info(player_name, raise_errors=False, refresh=False):
+    """
+    Get minimal player information, None if there is no such baseball
+    player. A failed request also gives None unless raise_errors is set,
+    for callers that must tell "not found" from "try again later".
+    refresh skips the cached answer.
+    """
     try:
         formatted_player_name = player_name.replace(" ", "_")
         ext = "searchplayers.php?p="
-        response = requests.get(f"{API_URL}/{ext}{formatted_player_name}")
-        response.raise_for_status()
-
-        player_info = response.json()
+        player_info = _get_json(ext, formatted_player_name, "player",
+                                refresh)
 
         if not player_info.get("player"):
             return None
@@ -30,17 +82,20 @@ def get_player_info(player_name):
         }
 
     except requests.exceptions.RequestException:
+        if raise_errors:
+            raise
         return None
 
 
-def get_player_teams(player_id):
-    """GEt the list of former teams for a given player based on player ID."""
+def get_player_teams(player_id, raise_errors=False, refresh=False):
+    """
+    GEt the list of former teams for a given player based on player ID.
+    ([] on a failed request unless raise_errors is set; refresh skips the
+    cached answer)
+    """
     try:
         ext = "lookupformerteams.php?id="
-        response = requests.get(f"{API_URL}/{ext}{player_id}")
-        response.raise_for_status()
-
-        player_info = response.json()
+        player_info = _get_json(ext, player_id, "formerteams", refresh)
 
         if not player_info.get("formerteams"):
             return []
@@ -57,17 +112,20 @@ def get_player_teams(player_id):
         ]
 
     except requests.exceptions.RequestException:
+        if raise_errors:
+            raise
         return []
 
 
-def get_player_honors(player_id):
-    """Get honors and achievements for the player based on player ID."""
+def get_player_honors(player_id, raise_errors=False, refresh=False):
+    """
+    Get honors and achievements for the player based on player ID.
+    ([] on a failed request unless raise_errors is set; refresh skips the
+    cached answer)
+    """
     try:
         ext = "lookuphonours.php?id="
-        response = requests.get(f"{API_URL}/{ext}{player_id}")
-        response.raise_for_status()
-
-        player_info = response.json()
+        player_info = _get_json(ext, player_id, "honours", refresh)
 
         if not player_info.get("honours"):
             return []
@@ -83,4 +141,6 @@ def get_player_honors(player_id):
         ]
 
     except requests.exceptions.RequestException:
+        if raise_errors:
+            raise
         return []
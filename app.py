@@ -2,12 +2,12 @@
 
 # region Imports
 import streamlit as st
-import pandas as pd
-import sqlite3
 from streamlit_option_menu import option_menu
 
 from api import get_player_info, get_player_honors, get_player_teams
-from database import get_all_teams, get_team_by_id, get_players_by_team_id
+from connections import get_read_connection
+from database import (fetch_all_teams, fetch_team, fetch_players,
+                      cached_team_profiles, ensure_schema)
 from trivia_game import TriviaGame, new_game
 from ai import ai_bot
 from data_displays import stadium_map, jersey_distribution, players_by_jersey
@@ -17,8 +17,11 @@ from data_displays import stadium_map, jersey_distribution, players_by_jersey
 # region Setup
 # This region set up the app
 
-# Connect to SQLite database
-conn = sqlite3.connect('mlb.db')
+
+# Streamlit runs this script as __main__, tests import it as app
+if __name__ == "__main__":
+    # Bring an older database file up to the current schema
+    ensure_schema()
 
 # Configure Streamlit page settings
 st.set_page_config(page_title="Inside the Park", page_icon="⚾",
@@ -91,9 +94,8 @@ def get_selected_team():
 
 def choosing_team():
     """Prompt user to select a team and update session state."""
-    teams_df = get_all_teams()
-    team_name_to_id = {row['name']: row['id']
-                       for _, row in teams_df.iterrows()}
+    teams = sorted(fetch_all_teams(), key=lambda row: row['name'])
+    team_name_to_id = {row['name']: row['id'] for row in teams}
     team_names = ["-- Please select a team.--"] + \
         list(team_name_to_id.keys())
 
@@ -117,18 +119,17 @@ if st.session_state['menu_option'] == "Choose a Team":
             not st.session_state['selected_team']):
         st.markdown("### Select your Favorite Team")
     else:
-        team = get_team_by_id(int(get_selected_team()))
+        team = fetch_team(int(get_selected_team()))
         st.markdown(
             f"### You chose the {team['name']}."
             + "\n #### Use the side bar to interact with your team!"
         )
-    df_teams = pd.read_sql_query(
-        "SELECT * FROM teams", conn)  # pull up all the teams
+    teams = fetch_all_teams()  # pull up all the teams
 
     cols_per_row = 2
     cols = st.columns(cols_per_row)
     # display the teams in 2 columns with the logo
-    for idx, row in df_teams.iterrows():
+    for idx, row in enumerate(teams):
         col = cols[idx % cols_per_row]
         with col:
             with st.container():
@@ -158,7 +159,7 @@ elif st.session_state['menu_option'] == "Team Info":
     if selected_team is None:
         st.stop()
     else:
-        team = get_team_by_id(int(selected_team))
+        team = fetch_team(int(selected_team))
         st.markdown(f"#### {team['name']} Info:")
         st.markdown(f"**🏟️ Stadium:** {team['stadium']}")
         st.markdown(f"**📍 Stadium Address:** {team['stadium_addr']}")
@@ -179,13 +180,13 @@ elif st.session_state['menu_option'] == "Get to Know the Players":
     if selected_team is None:
         st.stop()
     else:
-        team = get_team_by_id(int(selected_team))
+        team = fetch_team(int(selected_team))
 
     st.subheader(f"{team['name']} Roster")
-    players_df = get_players_by_team_id(int(get_selected_team()))
+    players = fetch_players(int(get_selected_team()))
 
     # display all the players
-    for _, row in players_df.iterrows():
+    for row in players:
         with st.expander(
             f"**# {row['jersey_number']} - {row['name']}**",
             expanded=False
@@ -208,8 +209,13 @@ elif st.session_state['menu_option'] == "Get to Know the Players":
                                                          False):
                 st.markdown(
                     f"##### **Additional Information about {row['name']}**")
-                # api for this player
-                player_info = get_player_info(row['name'])
+                # stored profile from the enrichment job (the team's
+                # profiles are loaded once and cached), else the api
+                profile = cached_team_profiles(row['team_id']).get(row['id'])
+                if profile:
+                    player_info = profile['info']
+                else:
+                    player_info = get_player_info(row['name'])
                 if player_info:
                     # the api's id for player (diff then database)
                     external_player_id = player_info.get('idPlayer', 0)
@@ -231,7 +237,8 @@ elif st.session_state['menu_option'] == "Get to Know the Players":
 
                     try:
                         # call the honors api with the players id
-                        player_honors = get_player_honors(external_player_id)
+                        player_honors = profile['honors'] if profile \
+                            else get_player_honors(external_player_id)
                     except Exception as e:
                         player_honors = None
                         st.error(f"Error retrieving honors: {e}")
@@ -250,7 +257,8 @@ elif st.session_state['menu_option'] == "Get to Know the Players":
 
                     try:
                         # call the former teams api with players id
-                        former_teams = get_player_teams(external_player_id)
+                        former_teams = profile['former_teams'] if profile \
+                            else get_player_teams(external_player_id)
                     except Exception as e:
                         former_teams = None
                         st.error(f"Error retrieving former teams: {e}")
@@ -310,7 +318,7 @@ elif st.session_state['menu_option'] == "Team Trivia":
 
         col1, col2 = st.columns([1, 1])
         with col1:
-            team = get_team_by_id(team_id)
+            team = fetch_team(team_id)
             st.markdown(f"## Play Ball!\n##### Your team: {team['name']}")
 
             if trivia_q:
@@ -375,6 +383,7 @@ elif st.session_state['menu_option'] == "MLB Data":
                       "🔢 Browse Players by Jersey Number"
                       ])
     # call the correct interactive display
+    conn = get_read_connection()
     if option == "📍 MLB Stadium Map":
         stadium_map(conn)
     elif option == "👕 Jersey Number Distribution":
@@ -386,6 +395,6 @@ elif st.session_state['menu_option'] == "MLB Data":
 # region Ask the Ump Page
 elif st.session_state['menu_option'] == "Ask the Ump":
     st.subheader("Ask the Ump")
-    # call ai bot
-    ai_bot()
+    # call ai bot, the reply shows up as it is written
+    ai_bot(stream=True)
 # endregion
@@ -0,0 +1,233 @@
+# This module times the hot paths of the app against synthetic leagues
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import timeit
+from types import SimpleNamespace
+from unittest import mock
+
+import connections
+import database
+import scraper
+from ai import build_prompt
+from chat_history import ChatHistory
+from data_displays import get_players_by_jersey
+from intent_router import route
+from synthetic_league import generate_league
+from trivia_question import get_random_trivia_question
+from ump_tools import run_tool
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "benchmarks")
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+# League sizes in teams, each with DEFAULT_PLAYERS players
+DEFAULT_SIZES = (30, 300, 3000)
+DEFAULT_PLAYERS = 40
+# Timing runs per benchmark; the median run is reported
+DEFAULT_REPEAT = 5
+# A benchmark fails when it is this many times slower than the baseline
+DEFAULT_TOLERANCE = 1.5
+
+# What the stubbed TheSportsDB API answers during the trivia benchmark
+STUB_PLAYER = {"idPlayer": "1", "strNationality": "Japan",
+               "dateBorn": "1994-07-05", "strPosition": "Pitcher"}
+STUB_TEAMS = [{"former_team": "Fighters", "move_type": "Permanent",
+               "joined": "2013", "departed": "2017"}]
+STUB_HONORS = [{"honour": "MVP", "team_name": "Angels", "year": "2021"}]
+# Messages in the chat the Ask the Ump prompt is built from
+CHAT_MESSAGES = 200
+
+
+def time_call(func, repeat=DEFAULT_REPEAT):
+    """
+    Median seconds for one call of func. Fast functions are called in a
+    loop (picked by timeit) so each run lasts long enough to measure.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = timer.repeat(repeat=repeat, number=number)
+    return statistics.median(runs) / number
+
+
+def database_benchmarks(team_id):
+    """The benchmarks that run once per league size."""
+    conn = connections.get_read_connection()
+    team_name = database.fetch_team_name(team_id)
+    arguments = json.dumps({"team": team_name})
+    return {
+        "get_all_teams": database.get_all_teams,
+        "get_players_by_team_id":
+            lambda: database.get_players_by_team_id(team_id),
+        "fetch_players": lambda: database.fetch_players(team_id),
+        "players_by_jersey": lambda: get_players_by_jersey(conn, 7),
+        # includes the shared roster cache, as in the app
+        "get_random_trivia_question":
+            lambda: get_random_trivia_question(team_id),
+        # what the Ump answers with: the router, then a model tool call
+        "route": lambda: route(f"Who wears #7 for the {team_name}?"),
+        "run_tool": lambda: run_tool("list_roster", arguments),
+    }
+
+
+def run_sizes(sizes, players=DEFAULT_PLAYERS, repeat=DEFAULT_REPEAT,
+              work_dir=None):
+    """Time the database benchmarks on a synthetic league of each size."""
+    results = {}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp, \
+            mock.patch("trivia_question.get_player_info",
+                       return_value=STUB_PLAYER), \
+            mock.patch("trivia_question.get_player_teams",
+                       return_value=STUB_TEAMS), \
+            mock.patch("trivia_question.get_player_honors",
+                       return_value=STUB_HONORS):
+        for size in sizes:
+            path = os.path.join(tmp, f"league-{size}.db")
+            # no profiles, so trivia goes through the (stubbed) api
+            generate_league(path, n_teams=size, players_per_team=players,
+                            profiles=False)
+            connections.configure(db_path=path)
+            database.clear_cache()
+            team_id = (size + 1) // 2
+            for name, func in database_benchmarks(team_id).items():
+                results[f"{name}[{size}]"] = time_call(func, repeat)
+        connections.configure(db_path=connections.DEFAULT_DB_PATH)
+        database.clear_cache()
+    return results
+
+
+def run_scraper(repeat=DEFAULT_REPEAT):
+    """Time scrape_players() parsing each saved roster page."""
+    results = {}
+    for filename in sorted(os.listdir(FIXTURES_DIR)):
+        if not filename.endswith(".html"):
+            continue
+        with open(os.path.join(FIXTURES_DIR, filename), "rb") as f:
+            page = SimpleNamespace(content=f.read(),
+                                   raise_for_status=lambda: None)
+        with mock.patch("http_client.get", return_value=page):
+            results[f"scrape_players[{filename}]"] = time_call(
+                lambda: scraper.scrape_players("fixture"), repeat)
+    return results
+
+
+def run_ump_context(repeat=DEFAULT_REPEAT, messages=CHAT_MESSAGES):
+    """
+    Time building the Ask the Ump prompt and answer key for the next
+    question of a long chat, as the app does on every message.
+    """
+    chat = [{"role": role, "content": f"{role} message {i}. " * 10}
+            for i in range(messages // 2) for role in ("user", "assistant")]
+    chat.append({"role": "user", "content": "Who wears #7 for the Mets?"})
+    history = ChatHistory()
+    return {"build_prompt": time_call(
+        lambda: build_prompt(history, chat, "gpt"), repeat)}
+
+
+def run(sizes=DEFAULT_SIZES, players=DEFAULT_PLAYERS, repeat=DEFAULT_REPEAT,
+        work_dir=None):
+    """Run every benchmark. Returns the report written as JSON."""
+    results = run_sizes(sizes, players=players, repeat=repeat,
+                        work_dir=work_dir)
+    results.update(run_scraper(repeat))
+    results.update(run_ump_context(repeat))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "sizes": list(sizes),
+            "players_per_team": players,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare seconds per call against the baseline.
+    Returns (rows, regressions), rows being (name, now, before, ratio)
+    with before and ratio None for benchmarks missing from the baseline.
+    """
+    rows = []
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        ratio = now / before if before else None
+        rows.append((name, now, before, ratio))
+        if ratio is not None and ratio > tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def format_rows(rows):
+    lines = [f"{'benchmark':<42} {'ms':>10} {'baseline':>10} {'ratio':>7}"]
+    for name, now, before, ratio in rows:
+        before = f"{before * 1000:10.3f}" if before else f"{'-':>10}"
+        ratio = f"{ratio:7.2f}" if ratio else f"{'-':>7}"
+        lines.append(f"{name:<42} {now * 1000:10.3f} {before} {ratio}")
+    return "\n".join(lines)
+
+
+def load_baseline(path):
+    """The results stored in a baseline file, {} if there is none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the hot paths and compare with a baseline")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated league sizes, in teams")
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYERS,
+                        help="players on each team")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timing runs per benchmark")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="where to write this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fail when this many times slower than baseline")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args.sizes, players=args.players, repeat=args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    rows, regressions = compare(report["results"],
+                                load_baseline(args.baseline),
+                                tolerance=args.tolerance)
+    print(format_rows(rows))
+    if regressions:
+        print(f"\nSLOWER than {args.tolerance}x the baseline: "
+              + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# This module keeps what the Ump is sent of a chat under a token budget
+import re
+from text_tokens import estimate_tokens
+
+# Question and answer pairs always sent word for word
+KEEP_TURNS = 4
+# Estimated tokens for the recent messages, older ones are summarized
+HISTORY_TOKEN_BUDGET = 1500
+# Estimated tokens for the running summary, its oldest lines drop off
+SUMMARY_TOKEN_BUDGET = 300
+# Longest line a summarized message becomes
+SUMMARY_LINE_CHARS = 160
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def message_tokens(message):
+    """Estimated tokens of a chat message, with a little for the role."""
+    return estimate_tokens(message["content"]) + 4
+
+
+def summarize_message(message):
+    """One short line for the running summary: who and their first point."""
+    who = "Fan" if message["role"] == "user" else "Ump"
+    text = " ".join(message["content"].split())
+    first = _SENTENCE_END.split(text, 1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    return f"{who}: {first}"
+
+
+class ChatHistory:
+    """
+    What the model sees of a chat: the last keep_turns exchanges word for
+    word, and a running summary of everything before them, each under its
+    own token budget. Messages are folded into the summary once, so the
+    work per turn does not grow with the length of the chat.
+    """
+
+    def __init__(self, keep_turns=KEEP_TURNS,
+                 token_budget=HISTORY_TOKEN_BUDGET,
+                 summary_tokens=SUMMARY_TOKEN_BUDGET):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.reset()
+
+    def reset(self):
+        """Forget the summary, for a new chat."""
+        self.summary = []
+        self.summary_used = 0
+        # messages[:folded] are in the summary
+        self.folded = 0
+
+    def _fold(self, message):
+        line = summarize_message(message)
+        self.summary.append(line)
+        self.summary_used += estimate_tokens(line)
+        while self.summary_used > self.summary_tokens and self.summary:
+            self.summary_used -= estimate_tokens(self.summary.pop(0))
+        self.folded += 1
+
+    def prompt_messages(self, messages):
+        """
+        The messages to send after the system prompt: a summary of the
+        older messages (if any) and the recent ones. The last message,
+        the fan's question, is always sent whole.
+        """
+        if self.folded > len(messages):
+            # the messages were cleared for a new chat
+            self.reset()
+
+        recent = messages[self.folded:]
+        used = sum(message_tokens(message) for message in recent)
+        while len(recent) > 1 and (len(recent) > 2 * self.keep_turns + 1
+                                   or used > self.token_budget):
+            used -= message_tokens(recent[0])
+            self._fold(recent[0])
+            recent = recent[1:]
+
+        if not self.summary:
+            return list(recent)
+        summary = {
+            "role": "system",
+            "content": "Earlier in this chat:\n" + "\n".join(self.summary)
+        }
+        return [summary] + list(recent)
@@ -0,0 +1,274 @@
+# This module hands out SQLite connections for the whole app
+import os
+import functools
+import itertools
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = os.environ.get("MLB_DB_PATH", "mlb.db")
+# Serve reads from an in-memory copy of the database (MLB_DB_SNAPSHOT=1)
+DEFAULT_SNAPSHOT = os.environ.get("MLB_DB_SNAPSHOT", "") not in ("", "0")
+# Seconds between checks of the file for changes in snapshot mode
+SNAPSHOT_CHECK_INTERVAL = 1.0
+
+# Applied to every connection, change them with configure()
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,
+    "cache_size": -16000,
+    "temp_store": "MEMORY",
+}
+# Idle read connections kept for reuse by new threads
+MAX_IDLE = 8
+# Extra attempts for a read that still finds the database locked after
+# busy_timeout, with the delay doubling from READ_RETRY_DELAY seconds
+READ_RETRIES = 3
+READ_RETRY_DELAY = 0.05
+# WAL pages written before SQLite checkpoints on its own during ingestion
+INGEST_AUTOCHECKPOINT = 10000
+
+_settings = {"db_path": DEFAULT_DB_PATH, "pragmas": dict(DEFAULT_PRAGMAS),
+             "snapshot": DEFAULT_SNAPSHOT}
+_local = threading.local()
+_idle = []
+# Re-entrant: a finalizer returning a connection may run while it is held
+_lock = threading.RLock()
+_writer_lock = threading.RLock()
+# Bumped by configure(), or when the database file is swapped for a new
+# one, so connections to the old file are not reused
+_generation = 0
+_inode = None
+# (file stamp, uri, holder connection) of the current in-memory copy
+_snapshot = None
+_snapshot_ids = itertools.count()
+_snapshot_checked = 0.0
+
+
+def db_path():
+    """The database file every connection opens."""
+    return _settings["db_path"]
+
+
+def file_stamp():
+    """
+    Fingerprint of the database files. Any write changes the size or
+    modification time of the main file or its WAL, so checking this
+    costs a stat call and no database round trip.
+    """
+    stamp = []
+    path = db_path()
+    for path in (path, path + "-wal"):
+        try:
+            info = os.stat(path)
+            stamp.append((info.st_ino, info.st_mtime_ns, info.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def configure(db_path=None, pragmas=None, snapshot=None):
+    """
+    Point the app at another database file, change the pragmas and/or
+    turn snapshot mode on or off. Pooled read connections are dropped
+    and reopened on next use.
+    """
+    global _generation, _inode, _snapshot
+    with _lock:
+        if db_path is not None:
+            _settings["db_path"] = str(db_path)
+            _inode = None
+        if pragmas is not None:
+            _settings["pragmas"] = dict(pragmas)
+        if snapshot is not None:
+            _settings["snapshot"] = bool(snapshot)
+        _generation += 1
+        while _idle:
+            _idle.pop()[1].close()
+        if _snapshot is not None:
+            _snapshot[2].close()
+            _snapshot = None
+    _local.__dict__.clear()
+
+
+def connect(path=None, uri=False):
+    """Open a new connection with the configured pragmas applied."""
+    conn = sqlite3.connect(path or db_path(), check_same_thread=False,
+                           uri=uri)
+    for name, value in _settings["pragmas"].items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def _release(generation, conn):
+    # Runs when the thread that leased conn is gone
+    with _lock:
+        if generation == _generation and len(_idle) < MAX_IDLE:
+            _idle.append((generation, conn))
+            return
+    conn.close()
+
+
+class _Lease:
+    """Ties a read connection to one thread; returns it to the pool after."""
+
+    def __init__(self, generation, conn):
+        self.generation = generation
+        self.conn = conn
+        weakref.finalize(self, _release, generation, conn)
+
+
+def _check_swapped():
+    """Start a new generation if the database file was replaced."""
+    global _generation, _inode
+    try:
+        inode = os.stat(db_path()).st_ino
+    except OSError:
+        return
+    if inode == _inode:
+        return
+    with _lock:
+        if inode != _inode:
+            if _inode is not None:
+                _generation += 1
+                while _idle:
+                    _idle.pop()[1].close()
+            _inode = inode
+
+
+def _check_snapshot():
+    """
+    Copy the database file into memory, again whenever the file has
+    changed since the last copy (checked every SNAPSHOT_CHECK_INTERVAL
+    seconds), and start a new generation so threads move over to it.
+    """
+    global _generation, _snapshot, _snapshot_checked
+    now = time.monotonic()
+    if _snapshot is not None and \
+            now - _snapshot_checked < SNAPSHOT_CHECK_INTERVAL:
+        return
+    _snapshot_checked = now
+    stamp = file_stamp()
+    if _snapshot is not None and _snapshot[0] == stamp:
+        return
+    with _lock:
+        if _snapshot is not None and _snapshot[0] == stamp:
+            return
+        # A shared-cache memory database lives while a connection to it is
+        # open; the holder keeps it alive between readers
+        uri = f"file:mlb-snapshot-{next(_snapshot_ids)}?mode=memory" \
+            "&cache=shared"
+        holder = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(db_path())
+        try:
+            source.backup(holder)
+        finally:
+            source.close()
+        if _snapshot is not None:
+            _snapshot[2].close()
+        _snapshot = (stamp, uri, holder)
+        _generation += 1
+        while _idle:
+            _idle.pop()[1].close()
+
+
+def get_read_connection():
+    """
+    Return this thread's read connection, reusing an idle one when the
+    thread has none yet. It is read only (PRAGMA query_only) and must not
+    be closed by the caller. If the database file has been atomically
+    replaced (see scrape_into_database.build_and_swap) a connection to the
+    new file is opened instead.
+
+    In snapshot mode reads are served from an in-memory copy of the file
+    that is reloaded as soon as the file changes.
+    """
+    if _settings["snapshot"]:
+        _check_snapshot()
+    else:
+        _check_swapped()
+    lease = getattr(_local, "lease", None)
+    if lease is not None and lease.generation == _generation:
+        return lease.conn
+
+    with _lock:
+        generation = _generation
+        conn = _idle.pop()[1] if _idle else None
+        uri = _snapshot[1] if _settings["snapshot"] else None
+    if conn is None:
+        conn = connect(uri, uri=True) if uri else connect()
+        conn.execute("PRAGMA query_only = ON")
+    _local.lease = _Lease(generation, conn)
+    return conn
+
+
+@contextmanager
+def writer(path=None):
+    """
+    Serialize writes: only one writer at a time in this process.
+    Yields a connection that commits when the block succeeds and rolls
+    back if it raises.
+    """
+    with _writer_lock:
+        conn = connect(path)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def enable_wal(conn, autocheckpoint=INGEST_AUTOCHECKPOINT):
+    """
+    Switch the database file to write-ahead logging (it stays that way),
+    so readers keep reading the last committed data while a refresh
+    writes. Automatic checkpoints are spaced out to autocheckpoint pages;
+    call checkpoint() when the load is done.
+    """
+    mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    conn.execute(f"PRAGMA wal_autocheckpoint = {int(autocheckpoint)}")
+    return mode
+
+
+def checkpoint(conn, mode="TRUNCATE"):
+    """
+    Copy the WAL back into the database file. TRUNCATE waits (up to
+    busy_timeout) for readers on older snapshots and then empties the WAL;
+    PASSIVE never waits. Returns (busy, wal pages, pages checkpointed).
+    """
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode}")
+    return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+
+def _is_locked(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_locked(func):
+    """
+    Retry a read a few times if SQLite still reports the database as
+    locked or busy after busy_timeout (e.g. during a schema change).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = READ_RETRY_DELAY
+        for attempt in range(READ_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_locked(e) or attempt == READ_RETRIES:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+    return wrapper
+
+
+def close_all():
+    """Close every pooled read connection (e.g. at shutdown or in tests)."""
+    configure()
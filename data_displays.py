@@ -4,54 +4,76 @@ from geopy.geocoders import Nominatim
 from time import sleep
 import streamlit as st
 import pandas as pd
+from connections import writer
 
 # First Data Display - map of the stadiums
 
 
-def add_lat_lng_columns():
+def add_lat_lng_columns(db_name=None):
     """This function adds columns to the database"""
-    conn = sqlite3.connect("mlb.db")
-    cur = conn.cursor()
-    try:
-        cur.execute("ALTER TABLE teams ADD COLUMN latitude REAL")
-    except sqlite3.OperationalError as e:
-        print(f"Column 'latitude' might already exist: {e}")
-    try:
-        cur.execute("ALTER TABLE teams ADD COLUMN longitude REAL")
-    except sqlite3.OperationalError as e:
-        print(f"Column 'longitude' might already exist: {e}")
-    conn.commit()
-    conn.close()
-
-
-def geocode_and_update_teams():
+    with writer(db_name) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("ALTER TABLE teams ADD COLUMN latitude REAL")
+        except sqlite3.OperationalError as e:
+            print(f"Column 'latitude' might already exist: {e}")
+        try:
+            cur.execute("ALTER TABLE teams ADD COLUMN longitude REAL")
+        except sqlite3.OperationalError as e:
+            print(f"Column 'longitude' might already exist: {e}")
+
+
+def copy_coordinates(source_db, db_name=None):
+    """
+    Reuse coordinates already found in another database for stadiums at
+    the same address, so a rebuilt database needn't geocode them again.
+    """
+    with writer(db_name) as conn:
+        conn.execute("ATTACH DATABASE ? AS source", (str(source_db),))
+        try:
+            conn.execute("""
+                UPDATE teams SET
+                    latitude = (SELECT s.latitude FROM source.teams s
+                                WHERE s.stadium_addr = teams.stadium_addr
+                                  AND s.latitude IS NOT NULL
+                                  AND s.longitude IS NOT NULL),
+                    longitude = (SELECT s.longitude FROM source.teams s
+                                 WHERE s.stadium_addr = teams.stadium_addr
+                                   AND s.latitude IS NOT NULL
+                                   AND s.longitude IS NOT NULL)
+                WHERE latitude IS NULL OR longitude IS NULL
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"No coordinates to copy from {source_db}: {e}")
+        conn.commit()
+        conn.execute("DETACH DATABASE source")
+
+
+def geocode_and_update_teams(db_name=None):
     """Find the coordinates of the stadiums - Using geocolater"""
     geolocator = Nominatim(user_agent="mlb_app")
-    conn = sqlite3.connect("mlb.db")
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT id, stadium_addr FROM teams
-        WHERE latitude IS NULL OR longitude IS NULL
-    """)
-    teams = cur.fetchall()
-
-    for team_id, address in teams:
-        try:
-            location = geolocator.geocode(address)
-            if location:
-                cur.execute(
-                    "UPDATE teams SET latitude = ?, longitude = ? "
-                    "WHERE id = ?",
-                    (location.latitude, location.longitude, team_id)
-                )
-                print(f"Updated team {team_id} - {address}")
-                sleep(1)  # Respect Nominatim usage policy
-        except Exception as e:
-            print(f"Error geocoding team {team_id} at '{address}': {e}")
-
-    conn.commit()
-    conn.close()
+    with writer(db_name) as conn:
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT id, stadium_addr FROM teams
+            WHERE latitude IS NULL OR longitude IS NULL
+        """)
+        teams = cur.fetchall()
+
+        for team_id, address in teams:
+            try:
+                location = geolocator.geocode(address)
+                if location:
+                    cur.execute(
+                        "UPDATE teams SET latitude = ?, longitude = ? "
+                        "WHERE id = ?",
+                        (location.latitude, location.longitude, team_id)
+                    )
+                    print(f"Updated team {team_id} - {address}")
+                    sleep(1)  # Respect Nominatim usage policy
+            except Exception as e:
+                print(f"Error geocoding team {team_id} at '{address}': {e}")
 
 
 def stadium_map(conn):
@@ -68,30 +90,38 @@ def stadium_map(conn):
 
 def jersey_distribution(conn):
     """This function makes a bar chart of the jersey numbers """
-    df = pd.read_sql_query("SELECT jersey_number FROM players", conn)
-    df['jersey_number'] = pd.to_numeric(df['jersey_number'], errors='coerce')
-    df = df.dropna()
-    st.bar_chart(df['jersey_number'].value_counts().sort_index())
+    # counted straight off the jersey index
+    df = pd.read_sql_query("""
+        SELECT jersey_num, COUNT(*) AS players FROM players
+        WHERE jersey_num IS NOT NULL
+        GROUP BY jersey_num ORDER BY jersey_num
+    """, conn)
+    st.bar_chart(df.set_index('jersey_num')['players'])
 
 # Second Data Display- Players by Number Slider
 
 
-def players_by_jersey(conn):
-    """This function is a slider to see players by a specific jersey number """
-    st.markdown("#### Select a jersey number:")
-    jersey_number = st.slider("", 0, 99, 0)
-
-    df_players = pd.read_sql_query(
+def get_players_by_jersey(conn, jersey_number):
+    """Players wearing a number, with their team (uses idx_players_jersey)"""
+    return pd.read_sql_query(
         """
         SELECT players.name, players.jersey_number, players.headshot_url,
                teams.name AS team_name
         FROM players
         JOIN teams ON players.team_id = teams.id
-        WHERE players.jersey_number = ?
+        WHERE players.jersey_num = ?
         """,
-        conn, params=(str(jersey_number),)
+        conn, params=(jersey_number,)
     )
 
+
+def players_by_jersey(conn):
+    """This function is a slider to see players by a specific jersey number """
+    st.markdown("#### Select a jersey number:")
+    jersey_number = st.slider("", 0, 99, 0)
+
+    df_players = get_players_by_jersey(conn, jersey_number)
+
     if df_players.empty:
         st.info(f"No players found with jersey number {jersey_number}.")
     else:
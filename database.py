@@ -1,13 +1,23 @@
 # This module creates and manages database and interactions
+import json
+import random
 import sqlite3
-from scraper import scrape_players
+import threading
+from scraper import scrape_players, scrape_all_players, DEFAULT_PER_HOST
 import pandas as pd
+import connections
 
 """Create Database"""
 
 
-def create_db(db_name="mlb.db"):
-    conn = sqlite3.connect(db_name)
+def create_db(db_name=None):
+    conn = connections.connect(db_name)
+    create_tables(conn)
+    return conn
+
+
+def create_tables(conn):
+    """Create any missing tables and indexes on conn (e.g. a writer())."""
     cur = conn.cursor()
 
     cur.execute("""
@@ -33,60 +43,572 @@ def create_db(db_name="mlb.db"):
         )
     """)
 
+    # Player details from TheSportsDB, filled in by the enrichment stage.
+    # external_id is NULL when the API had no baseball player by that name.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS player_profiles (
+            player_id INTEGER PRIMARY KEY,
+            external_id TEXT,
+            nationality TEXT,
+            date_born TEXT,
+            position TEXT,
+            fetched_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS player_former_teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id INTEGER,
+            former_team TEXT,
+            move_type TEXT,
+            joined TEXT,
+            departed TEXT,
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS player_honors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id INTEGER,
+            honour TEXT,
+            team_name TEXT,
+            year TEXT,
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    """)
+
+    # Pre-generated trivia, slot numbers run 0..n-1 per team: a bank
+    # loads in slot order and, from a connection of its own, a random
+    # question is a count and a slot lookup on idx_trivia_team_slot
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS trivia_questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INTEGER,
+            slot INTEGER,
+            question TEXT,
+            correct_answer TEXT,
+            choices TEXT,
+            image_url TEXT,
+            FOREIGN KEY (team_id) REFERENCES teams(id)
+        )
+    """)
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_trivia_team_slot "
+                "ON trivia_questions (team_id, slot)")
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_former_teams_player "
+                "ON player_former_teams (player_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_honors_player "
+                "ON player_honors (player_id)")
+
     conn.commit()
-    return conn
+    migrate_db(conn)
 
 
-"""Put Teams and Players into Database"""
+"""Bring an existing Database up to the current schema"""
 
 
-def insert_teams_and_players(conn, teams_data, player_scraper=scrape_players):
+def migrate_db(conn):
+    """
+    Add the integer jersey column and the players indexes. Safe to run
+    on every start: each step is skipped once it has been applied.
+    """
     cur = conn.cursor()
+    cur.execute("PRAGMA table_xinfo(players)")
+    columns = [row[1] for row in cur.fetchall()]
+
+    # jersey_number stays TEXT as scraped; jersey_num is its integer value
+    # (NULL for blanks and non-numbers) kept in sync by SQLite itself
+    if "jersey_num" not in columns:
+        cur.execute("""
+            ALTER TABLE players ADD COLUMN jersey_num INTEGER
+            GENERATED ALWAYS AS (
+                CASE WHEN jersey_number <> ''
+                      AND jersey_number NOT GLOB '*[^0-9]*'
+                THEN CAST(jersey_number AS INTEGER) END
+            ) VIRTUAL
+        """)
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_players_team "
+                "ON players (team_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_players_jersey "
+                "ON players (jersey_num)")
+    # players looked up by name, whatever the case (fetch_players_by_name)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_players_name "
+                "ON players (name COLLATE NOCASE)")
+    conn.commit()
+
+
+_schema_checked = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """
+    Create and migrate the tables of the configured database file once
+    per process, through writer(), so a file from an older version (like
+    the repo's mlb.db) has the current columns and indexes before the
+    app reads it.
+    """
+    path = connections.db_path()
+    with _schema_lock:
+        if path in _schema_checked:
+            return
+        with connections.writer() as conn:
+            create_tables(conn)
+        _schema_checked.add(path)
+
+
+"""Put Teams and Players into Database"""
 
+
+def insert_teams_and_players(conn, teams_data, player_scraper=scrape_players,
+                             max_workers=None, per_host=DEFAULT_PER_HOST,
+                             sync=False, batch_size=None, on_synced=None):
+    """
+    Insert the teams and their rosters. When max_workers is set the roster
+    pages are fetched and parsed in parallel first, and all the writes are
+    then done here on the calling thread. A roster of None means the
+    page did not change or could not be fetched, so that team's players
+    are left as they are.
+    By default everything is written with bulk_load. With sync=True team
+    details are updated in place and each roster is diffed against the
+    stored one (see sync_roster) instead of appended.
+    on_synced(team_ext) is called for each roster once it is committed
+    (e.g. to save its page in the ResponseCache).
+    """
+    team_exts = [team['team_ext'] for team in teams_data]
+    if max_workers and max_workers > 1:
+        rosters = scrape_all_players(team_exts, player_scraper=player_scraper,
+                                     max_workers=max_workers,
+                                     per_host=per_host)
+    else:
+        rosters = {team_ext: player_scraper(team_ext)
+                   for team_ext in team_exts}
+
+    if not sync:
+        bulk_load(conn, teams_data, rosters, batch_size=batch_size)
+        if on_synced:
+            for team_ext in team_exts:
+                if rosters[team_ext]:
+                    on_synced(team_ext)
+        return
+
+    cur = conn.cursor()
     for team in teams_data:
+        roster = rosters[team['team_ext']]
+        # the team's details and its roster diff are one transaction
+        with conn:
+            cur.execute("""
+                INSERT INTO teams (name, logo_url, stadium, stadium_addr,
+                                   phone, team_ext)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(team_ext) DO UPDATE SET
+                    name = excluded.name, logo_url = excluded.logo_url,
+                    stadium = excluded.stadium,
+                    stadium_addr = excluded.stadium_addr,
+                    phone = excluded.phone
+                RETURNING id
+            """, _team_values(team))
+            team_id = cur.fetchone()[0]
+            sync_roster(conn, team_id, roster)
+        if on_synced and roster:
+            on_synced(team['team_ext'])
+
+
+def _team_values(team):
+    return (
+        team['team_name'], team['logo_url'], team['stadium'],
+        team['stadium_addr'], team['phone'], team['team_ext']
+    )
+
+
+"""Load many Teams and Players at once"""
+
+
+def bulk_load(conn, teams_data, rosters, batch_size=None):
+    """
+    Write teams and their rosters with executemany in a single
+    transaction, so a full league load is one commit. rosters maps
+    team_ext -> list of players (None skips that team's players).
+    With batch_size the player rows are committed every batch_size rows
+    instead, which bounds the transaction for very large synthetic loads.
+    Returns the number of players written.
+    """
+    cur = conn.cursor()
+    cur.executemany("""
+        INSERT OR IGNORE INTO teams (name, logo_url, stadium, stadium_addr,
+                                     phone, team_ext)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [_team_values(team) for team in teams_data])
+
+    # One lookup for every team id instead of a SELECT per team
+    cur.execute("SELECT team_ext, id FROM teams")
+    team_ids = dict(cur.fetchall())
+
+    rows = (
+        (team_ids[team['team_ext']], player['player_name'],
+         player['jersey_number'], player['headshot_url'])
+        for team in teams_data
+        for player in rosters.get(team['team_ext']) or []
+    )
+
+    written = 0
+    for batch in _batches(rows, batch_size):
+        cur.executemany("""
+            INSERT INTO players (team_id, name, jersey_number, headshot_url)
+            VALUES (?, ?, ?, ?)
+        """, batch)
+        written += len(batch)
+        if batch_size:
+            conn.commit()
+
+    conn.commit()
+    return written
+
+
+def _batches(rows, batch_size):
+    """Yield lists of rows, all of them at once when batch_size is None"""
+    if not batch_size:
+        yield list(rows)
+        return
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+"""Bring a team's stored roster in line with a freshly scraped one"""
+
+
+def sync_roster(conn, team_id, players):
+    """
+    Diff the scraped players against the stored roster, keyed on
+    (team_id, player name), and apply only the inserts, updates and
+    deletes needed, in one transaction (along with anything already
+    written on conn, like the team's row). Duplicate rows left behind by
+    earlier append-only runs are removed too.
+    A roster of None (not fetched) or [] (a page with no players, e.g. an
+    error page) leaves the stored roster alone rather than deleting it.
+    Returns (inserted, updated, deleted).
+    """
+    if not players:
+        return 0, 0, 0
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, name, jersey_number, headshot_url
+        FROM players WHERE team_id = ? ORDER BY id
+    """, (team_id,))
+
+    stored = {}
+    deletes = []
+    for player_id, name, jersey_number, headshot_url in cur.fetchall():
+        if name in stored:
+            deletes.append((player_id,))
+        else:
+            stored[name] = (player_id, jersey_number, headshot_url)
+
+    inserts = []
+    updates = []
+    seen = set()
+    for player in players:
+        name = player['player_name']
+        if name in seen:
+            continue
+        seen.add(name)
+        fields = (player['jersey_number'], player['headshot_url'])
+        if name not in stored:
+            inserts.append((team_id, name) + fields)
+        elif stored[name][1:] != fields:
+            updates.append(fields + (stored[name][0],))
+
+    deletes += [(row[0],) for name, row in stored.items() if name not in seen]
+
+    with conn:
+        cur.executemany("""
+            INSERT INTO players (team_id, name, jersey_number, headshot_url)
+            VALUES (?, ?, ?, ?)
+        """, inserts)
+        cur.executemany("""
+            UPDATE players SET jersey_number = ?, headshot_url = ?
+            WHERE id = ?
+        """, updates)
+        cur.executemany("DELETE FROM players WHERE id = ?", deletes)
+
+    return len(inserts), len(updates), len(deletes)
+
+
+"""Store and read enriched Player Profiles"""
+
+
+def get_players_to_enrich(conn, refresh=False):
+    """
+    Return (id, name) of the players that still need a profile,
+    or of every player when refresh is True.
+    """
+    cur = conn.cursor()
+    if refresh:
+        cur.execute("SELECT id, name FROM players ORDER BY id")
+    else:
         cur.execute("""
-            INSERT OR IGNORE INTO teams (name, logo_url, stadium, stadium_addr,
-                                         phone, team_ext)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            team['team_name'], team['logo_url'], team['stadium'],
-            team['stadium_addr'], team['phone'], team['team_ext']
+            SELECT players.id, players.name FROM players
+            LEFT JOIN player_profiles
+                ON player_profiles.player_id = players.id
+            WHERE player_profiles.player_id IS NULL
+            ORDER BY players.id
+        """)
+    return cur.fetchall()
+
+
+def save_player_profile(conn, player_id, info, former_teams, honors):
+    """
+    Replace a player's profile, former teams and honors in one
+    transaction. info, former_teams and honors are shaped like the
+    results of the api.py functions (info may be None).
+    """
+    save_player_profiles(conn, [(player_id, info, former_teams, honors)])
+
+
+def save_player_profiles(conn, profiles):
+    """
+    save_player_profile() for many players in one transaction.
+    profiles is an iterable of (player_id, info, former_teams, honors).
+    """
+    profile_rows, former_rows, honor_rows = [], [], []
+    for player_id, info, former_teams, honors in profiles:
+        info = info or {}
+        profile_rows.append((
+            player_id, info.get("idPlayer"), info.get("strNationality"),
+            info.get("dateBorn"), info.get("strPosition")
         ))
+        former_rows.extend(
+            (player_id, team.get("former_team"), team.get("move_type"),
+             team.get("joined"), team.get("departed"))
+            for team in former_teams
+        )
+        honor_rows.extend(
+            (player_id, honor.get("honour"), honor.get("team_name"),
+             honor.get("year"))
+            for honor in honors
+        )
+    ids = [(row[0],) for row in profile_rows]
 
-        conn.commit()
+    with conn:
+        cur = conn.cursor()
+        cur.executemany("""
+            INSERT OR REPLACE INTO player_profiles
+                (player_id, external_id, nationality, date_born, position)
+            VALUES (?, ?, ?, ?, ?)
+        """, profile_rows)
+        cur.executemany("DELETE FROM player_former_teams WHERE player_id = ?",
+                        ids)
+        cur.executemany("""
+            INSERT INTO player_former_teams
+                (player_id, former_team, move_type, joined, departed)
+            VALUES (?, ?, ?, ?, ?)
+        """, former_rows)
+        cur.executemany("DELETE FROM player_honors WHERE player_id = ?", ids)
+        cur.executemany("""
+            INSERT INTO player_honors (player_id, honour, team_name, year)
+            VALUES (?, ?, ?, ?)
+        """, honor_rows)
+
+
+def delete_orphan_profiles(conn):
+    """Drop profile rows whose player is no longer on any roster."""
+    with conn:
+        for table in ("player_profiles", "player_former_teams",
+                      "player_honors"):
+            conn.execute(f"DELETE FROM {table} WHERE player_id NOT IN "
+                         "(SELECT id FROM players)")
 
-        cur.execute("SELECT id FROM teams WHERE team_ext = ?",
-                    (team['team_ext'],))
-        team_id = cur.fetchone()[0]
 
-        # Use the player_scraper function to scrape players
-        players = player_scraper(team['team_ext'])
+def _load_profiles(conn, player_ids_sql, params):
+    """
+    Stored profiles of the players player_ids_sql selects, keyed by
+    player id, in one query per profile table.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT player_id, external_id, nationality, date_born, position
+            FROM player_profiles WHERE player_id IN ({player_ids_sql})
+        """, params)
+        rows = cur.fetchall()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        # database built before profiles existed
+        return {}
+
+    profiles = {}
+    for player_id, external_id, nationality, date_born, position in rows:
+        info = None
+        if external_id is not None:
+            info = {
+                "idPlayer": external_id,
+                "strNationality": nationality,
+                "dateBorn": date_born,
+                "strPosition": position
+            }
+        profiles[player_id] = {"info": info, "former_teams": [],
+                               "honors": []}
+    if not profiles:
+        return profiles
+
+    cur.execute(f"""
+        SELECT player_id, former_team, move_type, joined, departed
+        FROM player_former_teams WHERE player_id IN ({player_ids_sql})
+        ORDER BY id
+    """, params)
+    for player_id, former_team, move_type, joined, departed in cur:
+        if player_id in profiles:
+            profiles[player_id]["former_teams"].append(
+                {"former_team": former_team, "move_type": move_type,
+                 "joined": joined, "departed": departed})
+
+    cur.execute(f"""
+        SELECT player_id, honour, team_name, year
+        FROM player_honors WHERE player_id IN ({player_ids_sql})
+        ORDER BY id
+    """, params)
+    for player_id, honour, team_name, year in cur:
+        if player_id in profiles:
+            profiles[player_id]["honors"].append(
+                {"honour": honour, "team_name": team_name, "year": year})
+    return profiles
+
+
+@connections.retry_locked
+def get_player_profile(player_id, conn=None):
+    """
+    Get a player's stored profile as a dict with 'info' (None when the
+    API had no data), 'former_teams' and 'honors', shaped like the
+    api.py results. Returns None if the player was never enriched.
+    """
+    if conn is None:
+        conn = get_connection()
+    return _load_profiles(conn, "?", (player_id,)).get(player_id)
 
-        for player in players:
-            cur.execute("""
-                INSERT INTO players (team_id, name, jersey_number,
-                        headshot_url)
-                VALUES (?, ?, ?, ?)
-            """, (
-                team_id,
-                player['player_name'],
-                player['jersey_number'],
-                player['headshot_url']
-            ))
 
-        conn.commit()
+@connections.retry_locked
+def get_team_profiles(team_id, conn=None):
+    """
+    get_player_profile() for every enriched player on a team at once,
+    as a dict of player id -> profile.
+    """
+    if conn is None:
+        conn = get_connection()
+    return _load_profiles(conn, "SELECT id FROM players WHERE team_id = ?",
+                          (team_id,))
+
+
+"""Store and sample the Trivia Question Bank"""
+
+
+def save_trivia_bank(conn, team_id, questions):
+    """
+    Replace a team's banked questions in one transaction. questions are
+    dicts like TriviaQuestion.to_dict().
+    """
+    with conn:
+        conn.execute("DELETE FROM trivia_questions WHERE team_id = ?",
+                     (team_id,))
+        conn.executemany("""
+            INSERT INTO trivia_questions
+                (team_id, slot, question, correct_answer, choices, image_url)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (team_id, slot, q["question"], q["correct_answer"],
+             json.dumps(q["choices"]), q["image_url"])
+            for slot, q in enumerate(questions)
+        ])
+
+
+@connections.retry_locked
+def get_trivia_bank(team_id, conn=None):
+    """
+    A team's banked questions in slot order, as dicts like
+    TriviaQuestion.to_dict(); [] if the team has no bank.
+    """
+    if conn is None:
+        conn = get_connection()
+
+    try:
+        rows = conn.execute("""
+            SELECT question, correct_answer, choices, image_url
+            FROM trivia_questions WHERE team_id = ? ORDER BY slot
+        """, (team_id,)).fetchall()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        # database built before the trivia bank existed
+        return []
+
+    return [
+        {"question": question, "correct_answer": correct_answer,
+         "choices": json.loads(choices), "image_url": image_url}
+        for question, correct_answer, choices, image_url in rows
+    ]
+
+
+@connections.retry_locked
+def _banked_question_by_slot(conn, team_id):
+    # a random slot of the team's 0..n-1, two lookups on the slot index
+    try:
+        (count,) = conn.execute(
+            "SELECT COUNT(*) FROM trivia_questions WHERE team_id = ?",
+            (team_id,)).fetchone()
+        if not count:
+            return None
+        question, correct_answer, choices, image_url = conn.execute("""
+            SELECT question, correct_answer, choices, image_url
+            FROM trivia_questions WHERE team_id = ? AND slot = ?
+        """, (team_id, random.randrange(count))).fetchone()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        return None
+    return {"question": question, "correct_answer": correct_answer,
+            "choices": json.loads(choices), "image_url": image_url}
+
+
+def get_random_banked_question(team_id, conn=None):
+    """
+    Pick a random banked question for the team as a dict like
+    TriviaQuestion.to_dict(), or None if the team has no bank. Without
+    conn the bank comes from the process-wide cache, so picking a
+    question does not touch the database; with conn it is looked up by
+    slot.
+    """
+    if conn is not None:
+        return _banked_question_by_slot(conn, team_id)
+    bank = cached_trivia_bank(team_id)
+    if not bank:
+        return None
+    question = random.choice(bank)
+    # TriviaQuestion shuffles its choices, keep the cached list intact
+    return dict(question, choices=list(question["choices"]))
 
 
 """ Pull the connection - for easier use"""
 
 
 def get_connection():
-    return sqlite3.connect("mlb.db")
+    # This thread's pooled read connection, don't close it
+    return connections.get_read_connection()
 
 
 """Return all the teams in the database"""
 
 
+@connections.retry_locked
 def get_all_teams():
     with get_connection() as conn:
         return pd.read_sql_query("""
@@ -98,6 +620,7 @@ def get_all_teams():
 """Get a team by id in the database"""
 
 
+@connections.retry_locked
 def get_team_by_id(team_id):
     with get_connection() as conn:
         team_id = int(team_id)  # Ensure input is an integer
@@ -110,13 +633,14 @@ def get_team_by_id(team_id):
 """Get players by the team"""
 
 
+@connections.retry_locked
 def get_players_by_team_id(team_id):
     """
     Get players for a team by team_id.
     """
     with get_connection() as conn:
         return pd.read_sql_query(
-            "SELECT name, jersey_number, headshot_url, team_id "
+            "SELECT id, name, jersey_number, headshot_url, team_id "
             "FROM players WHERE team_id = ?",
             conn, params=(team_id,)
         )
@@ -125,6 +649,7 @@ def get_players_by_team_id(team_id):
 """Get the team name from the team ID"""
 
 
+@connections.retry_locked
 def get_team_name_by_id(team_id, conn=None):
     """
     Get team name by team_id.
@@ -137,3 +662,153 @@ def get_team_name_by_id(team_id, conn=None):
             "SELECT name FROM teams WHERE id = ?", conn, params=(team_id,)
         )
         return df.iloc[0]["name"] if not df.empty else "Unknown"
+
+
+"""Fast lookups - plain sqlite3.Row results, no DataFrame"""
+
+# Use these where a page only shows a row or a roster; keep the DataFrame
+# functions above for charts and the pandas-based trivia generators.
+# Rows support row["name"] and row.keys() and are read only.
+
+
+def _fetch(query, params=()):
+    cur = get_connection().cursor()
+    cur.row_factory = sqlite3.Row
+    return cur.execute(query, params)
+
+
+@connections.retry_locked
+def fetch_all_teams():
+    """All the teams as a list of rows, in the order they were scraped."""
+    return _fetch("""
+        SELECT id, name, logo_url, stadium, stadium_addr, phone, team_ext
+        FROM teams ORDER BY id
+    """).fetchall()
+
+
+@connections.retry_locked
+def fetch_team(team_id):
+    """One team's row, or None if there is no such team."""
+    return _fetch("SELECT * FROM teams WHERE id = ?",
+                  (int(team_id),)).fetchone()
+
+
+@connections.retry_locked
+def fetch_team_name(team_id):
+    """A team's name, or "Unknown"."""
+    row = _fetch("SELECT name FROM teams WHERE id = ?",
+                 (int(team_id),)).fetchone()
+    return row["name"] if row is not None else "Unknown"
+
+
+@connections.retry_locked
+def fetch_players(team_id):
+    """A team's players as a list of rows (uses idx_players_team)."""
+    return _fetch("""
+        SELECT id, name, jersey_number, headshot_url, team_id
+        FROM players WHERE team_id = ? ORDER BY id
+    """, (int(team_id),)).fetchall()
+
+
+@connections.retry_locked
+def search_teams(text):
+    """Teams whose name or url name contains text, ignoring case."""
+    pattern = f"%{text.strip()}%"
+    return _fetch("""
+        SELECT id, name, stadium, stadium_addr, phone, team_ext
+        FROM teams WHERE name LIKE ? OR team_ext LIKE ? ORDER BY name
+    """, (pattern, pattern)).fetchall()
+
+
+@connections.retry_locked
+def fetch_players_by_jersey(jersey_number, team_id=None):
+    """
+    Players wearing a number with their team name, on one team or
+    across the league (uses idx_players_jersey).
+    """
+    query = """
+        SELECT players.name, players.jersey_number, teams.name AS team_name
+        FROM players JOIN teams ON teams.id = players.team_id
+        WHERE players.jersey_num = ?
+    """
+    params = [int(jersey_number)]
+    if team_id is not None:
+        query += " AND players.team_id = ?"
+        params.append(int(team_id))
+    return _fetch(query + " ORDER BY teams.name, players.name",
+                  params).fetchall()
+
+
+@connections.retry_locked
+def fetch_players_by_name(name):
+    """
+    Players called name, ignoring case, with their team name
+    (uses idx_players_name).
+    """
+    return _fetch("""
+        SELECT players.name, players.jersey_number, teams.name AS team_name
+        FROM players JOIN teams ON teams.id = players.team_id
+        WHERE players.name COLLATE NOCASE = ?
+        ORDER BY teams.name
+    """, (name,)).fetchall()
+
+
+"""Process-wide cache of what the trivia generators read"""
+
+_cache = {}
+_cache_stamp = None
+_cache_lock = threading.Lock()
+
+
+def _cached(key, loader):
+    global _cache_stamp
+    stamp = connections.file_stamp()
+    with _cache_lock:
+        if stamp != _cache_stamp:
+            _cache.clear()
+            _cache_stamp = stamp
+        if key in _cache:
+            return _cache[key]
+
+    value = loader()
+    with _cache_lock:
+        if stamp == _cache_stamp:
+            _cache[key] = value
+    return value
+
+
+def clear_cache():
+    """Forget everything cached here (the next read reloads it)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def cached_all_teams():
+    """get_all_teams(), shared until the database changes. Don't modify."""
+    return _cached(("teams",), get_all_teams)
+
+
+def cached_players_by_team_id(team_id):
+    """
+    get_players_by_team_id(), shared until the database changes.
+    Don't modify the returned DataFrame.
+    """
+    team_id = int(team_id)
+    return _cached(("players", team_id),
+                   lambda: get_players_by_team_id(team_id))
+
+
+def cached_team_profiles(team_id):
+    """
+    get_team_profiles(), shared until the database changes. Don't modify
+    the returned profiles.
+    """
+    team_id = int(team_id)
+    return _cached(("profiles", team_id),
+                   lambda: get_team_profiles(team_id))
+
+
+def cached_trivia_bank(team_id):
+    """get_trivia_bank(), shared until the database changes. Don't modify."""
+    team_id = int(team_id)
+    return _cached(("bank", team_id), lambda: get_trivia_bank(team_id))
@@ -0,0 +1,156 @@
+# This module keeps an on-disk cache of scraped pages for conditional GETs
+import hashlib
+import json
+import os
+import threading
+import requests
+import http_client
+
+DEFAULT_CACHE_DIR = ".http_cache"
+
+
+class ResponseCache:
+    """
+    Stores the body, ETag, Last-Modified and a hash of the body per URL.
+    fetch() sends a conditional request and reports whether the page
+    changed since it was last saved.
+    A changed page is only pending until save() is called for it, which
+    the caller does once what it parsed from the page is stored. Until
+    then the previous page stays the cached one, so a run that fails
+    after fetching fetches the page again next time instead of skipping
+    it. Each body is kept in a file named after its hash and only
+    becomes the cached page when the index pointing at it is saved.
+    With refresh every page counts as changed (e.g. for an empty
+    database), while its new validators are still recorded.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+        # url -> index entry of a fetched page not saved yet
+        self.pending = {}
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _body_path(self, url, digest):
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}-{digest[:16]}.html")
+
+    def _read_body(self, url, entry):
+        try:
+            with open(self._body_path(url, entry["sha256"]), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remove_body(self, url, entry):
+        try:
+            os.remove(self._body_path(url, entry["sha256"]))
+        except OSError:
+            pass
+
+    def fetch(self, url):
+        """
+        Return (content, changed) for the url; a changed page is pending
+        until save(url). Raises requests.HTTPError for an error response,
+        which is never cached or reported as new content.
+        """
+        with self.lock:
+            entry = self.index.get(url)
+        cached_body = self._read_body(url, entry) if entry else None
+
+        headers = {}
+        if cached_body is not None and not self.refresh:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304 and cached_body is not None:
+            return cached_body, False
+        if not response.ok:
+            raise requests.HTTPError(
+                f"{response.status_code} fetching {url}", response=response)
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        changed = (self.refresh or cached_body is None
+                   or entry.get("sha256") != digest)
+
+        # the body first, under its own name; saving the index commits it
+        body_path = self._body_path(url, digest)
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(content)
+        os.replace(body_path + ".tmp", body_path)
+        with self.lock:
+            self.pending[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest
+            }
+        if not changed:
+            # same body, only the validators are new
+            self.save(url)
+        return content, changed
+
+    def save(self, *urls):
+        """
+        Make the pending pages for urls (all of them when none are given)
+        the cached ones. Call it once what was parsed from them is stored.
+        """
+        with self.lock:
+            urls = [url for url in (urls or list(self.pending))
+                    if url in self.pending]
+            if not urls:
+                return
+            saved, self.index = self.index, dict(self.index)
+            replaced = []
+            for url in urls:
+                old = saved.get(url)
+                self.index[url] = entry = self.pending[url]
+                if old and old["sha256"] != entry["sha256"]:
+                    replaced.append((url, old))
+            try:
+                self._save_index()
+            except BaseException:
+                # still pending, and the index on disk is unchanged
+                self.index = saved
+                raise
+            for url in urls:
+                del self.pending[url]
+        for url, old in replaced:
+            self._remove_body(url, old)
+
+    def discard(self):
+        """Drop the pending pages, keeping the saved ones cached."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for url, entry in pending.items():
+                saved = self.index.get(url)
+                if not saved or saved["sha256"] != entry["sha256"]:
+                    self._remove_body(url, entry)
+
+    def clear(self):
+        """Forget every cached page (next fetch counts as changed)."""
+        with self.lock:
+            for url, entry in self.index.items():
+                self._remove_body(url, entry)
+            self.index = {}
+            self.pending = {}
+            self._save_index()
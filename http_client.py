@@ -0,0 +1,100 @@
+# This module holds the shared HTTP session used by scraper.py and api.py
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Seconds to wait for the connection and then for the response
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+# Retry throttling and server errors with exponential backoff
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Connections kept open per host, requests beyond this wait for one
+POOL_MAXSIZE = 4
+
+_settings = {
+    "connect_timeout": CONNECT_TIMEOUT,
+    "read_timeout": READ_TIMEOUT,
+    "retries": RETRIES,
+    "backoff_factor": BACKOFF_FACTOR,
+    "pool_maxsize": POOL_MAXSIZE,
+}
+_session = None
+_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=_settings["retries"],
+        backoff_factor=_settings["backoff_factor"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        # hand the last response back so callers can raise_for_status
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_maxsize=_settings["pool_maxsize"],
+        pool_block=True
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def configure(**settings):
+    """
+    Change timeouts, retries, backoff_factor or pool_maxsize.
+    The next request builds a new session with the new settings.
+    """
+    global _session
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise TypeError(f"Unknown HTTP settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _settings.update(settings)
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get(url, **kwargs):
+    """GET through the shared session with the configured timeouts."""
+    kwargs.setdefault(
+        "timeout", (_settings["connect_timeout"], _settings["read_timeout"])
+    )
+    return get_session().get(url, **kwargs)
+
+
+class RateLimiter:
+    """Spaces calls out so no more than rate happen per second."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may make its next call."""
+        with self.lock:
+            now = self.clock()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
@@ -0,0 +1,232 @@
+# This module answers simple roster questions from the database, no LLM
+import re
+import database
+from connections import retry_locked, file_stamp
+from text_tokens import tokenize
+
+# How a question names a team, a player and a jersey number
+_TEAM = r"(?:the )?(?P<team>[\w .'&-]+?)"
+_PLAYER = r"(?P<player>[\w .'-]+?)"
+_NUMBER = r"(?:#|number |no\.? ?|jersey (?:number |#)?)(?P<number>\d{1,2})"
+_OWNER = r"(?:'s?)?"
+
+# The whole question has to have one of these shapes to be answered
+# here; anything longer or different goes to the model
+SHAPES = [
+    ("jersey", rf"who (?:wears|is wearing|has|is) {_NUMBER}"
+               rf"(?: (?:for|on) {_TEAM})?"),
+    ("jersey", rf"(?:which|what) players? (?:wears?|is wearing|has|have) "
+               rf"{_NUMBER}(?: (?:for|on) {_TEAM})?"),
+    ("stadium", rf"where do(?:es)? {_TEAM} play(?: their home games)?"),
+    ("stadium", rf"what (?:stadium|ballpark) do(?:es)? {_TEAM} play "
+                rf"(?:in|at)"),
+    ("stadium", rf"(?:what|where)(?:'s| is) {_TEAM}{_OWNER} "
+                rf"(?:stadium|ballpark|home (?:field|park))"),
+    ("stadium", rf"what(?:'s| is) the (?:stadium|ballpark|home field) "
+                rf"(?:of|for) {_TEAM}"),
+    ("phone", rf"what(?:'s| is) the (?:phone|telephone|contact) number "
+              rf"(?:for|of) {_TEAM}"),
+    ("phone", rf"what(?:'s| is) {_TEAM}{_OWNER} "
+              rf"(?:phone|telephone|contact) number"),
+    ("phone", rf"how (?:do|can) i (?:call|contact|reach) {_TEAM}"),
+    ("roster", rf"who (?:plays|is playing) (?:for|on) {_TEAM}"),
+    ("roster", rf"(?:what|who)(?:'s| is) (?:on )?{_TEAM}{_OWNER} roster"),
+    ("roster", rf"(?:what|who)(?:'s| is) on the roster (?:for|of) {_TEAM}"),
+    ("roster", rf"(?:show|list|give)(?: me)? {_TEAM}{_OWNER} "
+               rf"(?:roster|players)"),
+    ("player_team", rf"(?:what|which) team (?:does|is) {_PLAYER} "
+                    rf"(?:play for|play on|on)"),
+    ("player_team", rf"who does {_PLAYER} play for"),
+    ("player_number", rf"what (?:number|jersey(?: number)?) does "
+                      rf"{_PLAYER} wear"),
+    ("player_number", rf"what(?:'s| is) {_PLAYER}{_OWNER} "
+                      rf"(?:jersey )?number"),
+    ("player_number", rf"what number is {_PLAYER}{_OWNER} jersey"),
+]
+_SHAPES = [(intent, re.compile(shape, re.I)) for intent, shape in SHAPES]
+
+# Words that make even a well shaped question one for the model: a
+# reason, a judgement, another time or a position
+_QUALIFIERS = re.compile(
+    r"\b(?:why|how come|best|worst|greatest|better|before|after|since|"
+    r"until|used to|ever|last|next|former|first|second|third|base|"
+    r"pitchers?|catchers?|shortstops?|outfielders?|infielders?|"
+    r"designated|starting|starters?|closers?|relievers?)\b", re.I)
+
+# Team aliases and the file stamp they were built from
+_aliases = (None, None)
+
+
+"""Find the Team and the Players a question is about"""
+
+
+def build_aliases():
+    """
+    Map the ways a team is named (full name, last word or two, url name)
+    to its id. Names that fit more than one team, like "sox", are left
+    out.
+    """
+    seen = {}
+    for team in database.fetch_all_teams():
+        words = tokenize(team["name"])
+        names = {" ".join(words), " ".join(words[-1:]),
+                 " ".join(words[-2:]),
+                 " ".join(tokenize(team["team_ext"] or ""))}
+        for alias in names - {""}:
+            seen.setdefault(alias, set()).add(team["id"])
+    return {alias: ids.pop() for alias, ids in seen.items() if len(ids) == 1}
+
+
+def get_aliases():
+    """The team aliases, rebuilt only when the database file changes."""
+    global _aliases
+    stamp = file_stamp()
+    built_from, aliases = _aliases
+    if aliases is None or built_from != stamp:
+        aliases = build_aliases()
+        _aliases = (stamp, aliases)
+    return aliases
+
+
+def clear_aliases():
+    """Forget the cached aliases (the next question rebuilds them)."""
+    global _aliases
+    _aliases = (None, None)
+
+
+def find_team(question):
+    """The id of the team named in the question (longest name wins)."""
+    aliases = get_aliases()
+    words = tokenize(question)
+    for size in range(min(len(words), 4), 0, -1):
+        for start in range(len(words) - size + 1):
+            team_id = aliases.get(" ".join(words[start:start + size]))
+            if team_id is not None:
+                return team_id
+    return None
+
+
+def team_named(text):
+    """The id of the team text names exactly (any alias), else None."""
+    return get_aliases().get(" ".join(tokenize(re.sub(r"'s?$", "", text))))
+
+
+def players_named(name):
+    """Players called name, any case ("Judge's" read as "Judge")."""
+    return database.fetch_players_by_name(re.sub(r"'s?$", "", name.strip()))
+
+
+"""Answer each kind of question"""
+
+
+def _join_names(names):
+    if len(names) == 1:
+        return names[0]
+    return ", ".join(names[:-1]) + " and " + names[-1]
+
+
+def answer_jersey(number, team_id):
+    """Who wears a number, on one team or across the league."""
+    players = database.fetch_players_by_jersey(number, team_id)
+    if team_id is not None:
+        team = database.fetch_team(team_id)["name"]
+        if not players:
+            return f"Nobody on the {team} roster wears #{number}."
+        return f"#{number} for the {team}: " + _join_names(
+            [player["name"] for player in players]) + "."
+
+    if not players:
+        return f"Nobody in the league wears #{number}."
+    return f"Players wearing #{number}: " + _join_names(
+        [f"{player['name']} ({player['team_name']})"
+         for player in players]) + "."
+
+
+def answer_stadium(team_id):
+    team = database.fetch_team(team_id)
+    return (f"The {team['name']} play at {team['stadium']}, "
+            f"{team['stadium_addr']}.")
+
+
+def answer_phone(team_id):
+    team = database.fetch_team(team_id)
+    phone = re.sub(r"^Phone:\s*", "", team["phone"] or "")
+    if not phone:
+        return None
+    return f"You can reach the {team['name']} at {phone}."
+
+
+def answer_roster(team_id):
+    players = sorted(database.fetch_players(team_id),
+                     key=lambda player: player["name"])
+    if not players:
+        return None
+    team = database.fetch_team(team_id)["name"]
+    return f"The {team} roster: " + _join_names([
+        f"{player['name']} (#{player['jersey_number']})"
+        if player["jersey_number"] else player["name"]
+        for player in players]) + "."
+
+
+def answer_player_team(players):
+    return " ".join(f"{player['name']} plays for the {player['team_name']}."
+                    for player in players)
+
+
+def answer_player_number(players):
+    return " ".join(
+        f"{player['name']} wears #{player['jersey_number']} for the "
+        f"{player['team_name']}." if player["jersey_number"]
+        else f"{player['name']} of the {player['team_name']} has no number "
+             f"listed."
+        for player in players)
+
+
+def _clean(question):
+    # one line, straight apostrophes, no closing punctuation
+    text = " ".join(question.replace("\u2019", "'").split())
+    return text.rstrip("?!. ")
+
+
+def _answer(intent, parts):
+    if intent in ("player_team", "player_number"):
+        players = players_named(parts["player"])
+        if not players:
+            return None
+        if intent == "player_team":
+            return answer_player_team(players)
+        return answer_player_number(players)
+
+    team_id = None
+    if parts.get("team"):
+        team_id = team_named(parts["team"])
+        if team_id is None:
+            # not a team we know by that name, e.g. "the best player on
+            # the Yankees"
+            return None
+    if intent == "jersey":
+        return answer_jersey(int(parts["number"]), team_id)
+    if intent == "stadium":
+        return answer_stadium(team_id)
+    if intent == "phone":
+        return answer_phone(team_id)
+    return answer_roster(team_id)
+
+
+@retry_locked
+def route(question):
+    """
+    Answer a roster question straight from the database, or return None
+    so it goes to the model. Only questions that are exactly one of the
+    SHAPES (who wears #N (for T)?, where do T play?, what is T's roster?,
+    what number does P wear? ...) and name a known team or player are
+    answered here.
+    """
+    text = _clean(question)
+    if _QUALIFIERS.search(text):
+        return None
+    for intent, shape in _SHAPES:
+        match = shape.fullmatch(text)
+        if match:
+            return _answer(intent, match.groupdict())
+    return None
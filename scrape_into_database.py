@@ -1,20 +1,384 @@
-from scraper import scrape_teams
-from database import create_db, insert_teams_and_players
-from data_displays import add_lat_lng_columns, geocode_and_update_teams
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import requests
+from scraper import (scrape_teams, scrape_players, ROSTER_URL,
+                     DEFAULT_WORKERS, DEFAULT_PER_HOST)
+from http_cache import ResponseCache
+from http_client import RateLimiter
+from connections import (enable_wal, checkpoint, connect, writer,
+                         db_path as live_db)
+from api import get_player_info, get_player_teams, get_player_honors
+from database import (create_tables, insert_teams_and_players,
+                      get_players_to_enrich, save_player_profile,
+                      delete_orphan_profiles)
+from data_displays import (add_lat_lng_columns, geocode_and_update_teams,
+                           copy_coordinates)
+
+
+# TheSportsDB calls per second during enrichment
+DEFAULT_API_RATE = 5.0
+# A fresh build must have at least this many teams to be swapped in
+MIN_TEAMS = 30
+# Tries at emptying the live WAL before a swap gives up, the delay
+# between them doubling from SWAP_RETRY_DELAY seconds
+SWAP_RETRIES = 5
+SWAP_RETRY_DELAY = 0.2
+
+
+# Fetch every player's details from the API into the profile tables
+
+def fetch_player_profile(name, limiter, refresh=False):
+    """
+    Make the (up to) three API calls for one player. Returns
+    (info, former_teams, honors), with info None when the API has no
+    such player, or None when a call failed (timeout, 429, 5xx) so
+    nothing is stored and the player is tried again on the next run.
+    With refresh the API's answers are fetched even when cached.
+    """
+    try:
+        limiter.wait()
+        info = get_player_info(name, raise_errors=True, refresh=refresh)
+        if not info:
+            return None, [], []
+        limiter.wait()
+        former_teams = get_player_teams(info["idPlayer"], raise_errors=True,
+                                        refresh=refresh)
+        limiter.wait()
+        honors = get_player_honors(info["idPlayer"], raise_errors=True,
+                                   refresh=refresh)
+    except requests.exceptions.RequestException as e:
+        print(f"Could not fetch a profile for {name}: {e}")
+        return None
+    return info, former_teams, honors
+
+
+def enrich_players(conn, max_workers=DEFAULT_WORKERS, rate=DEFAULT_API_RATE,
+                   refresh=False):
+    """
+    Fetch profiles for the players that don't have one yet (all of them,
+    from the API rather than its cache, with refresh) on a pool of
+    workers sharing one rate limit, and store them from this thread as
+    each one finishes. Players whose calls failed are left without a
+    profile, for the next run. Returns how many were saved.
+    """
+    delete_orphan_profiles(conn)
+    players = get_players_to_enrich(conn, refresh=refresh)
+    limiter = RateLimiter(rate)
+
+    saved = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_player_profile, name, limiter,
+                        refresh): player_id
+            for player_id, name in players
+        }
+        for future in as_completed(futures):
+            profile = future.result()
+            if profile is None:
+                continue
+            info, former_teams, honors = profile
+            save_player_profile(conn, futures[future], info, former_teams,
+                                honors)
+            saved += 1
+    return saved
 
 
 # Makes the Scrape and the Database Creation Interaction
 
-def main():
+def _save_roster_page(cache, team_ext):
+    cache.save(ROSTER_URL.format(team_ext=team_ext))
+
+
+def main(max_workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+         cache_dir=None, enrich=True, api_rate=DEFAULT_API_RATE,
+         refresh_profiles=False, db_path=None, previous_db=None,
+         save_cache=True):
+    """
+    Scrape, geocode and enrich into db_path. Returns the ResponseCache
+    used with cache_dir (else None). Each roster page is saved in it
+    once its roster is committed; with save_cache=False they are all
+    left pending, for build_and_swap to save once the build is live.
+    """
     url = "https://www.mlb.com/team"
-    teams_data = scrape_teams(url)
+    cache = None
+    # The whole run is one writer: other writes in this process wait
+    with writer(db_path) as conn:
+        create_tables(conn)
+        # Readers in the app keep seeing the last committed data while
+        # we write
+        enable_wal(conn)
+
+        player_scraper = scrape_players
+        on_synced = None
+        if cache_dir:
+            # An empty database must be filled whatever the cache says
+            players = conn.execute("SELECT COUNT(*) FROM players")
+            cache = ResponseCache(cache_dir,
+                                  refresh=players.fetchone()[0] == 0)
+            player_scraper = partial(scrape_players, cache=cache)
+            if save_cache:
+                on_synced = partial(_save_roster_page, cache)
+
+        try:
+            teams_data = scrape_teams(url, cache=cache)
+
+            # Rosters are fetched in parallel, written on this thread and
+            # synced against what is stored so re-running never
+            # duplicates players
+            insert_teams_and_players(conn, teams_data,
+                                     player_scraper=player_scraper,
+                                     max_workers=max_workers,
+                                     per_host=per_host, sync=True,
+                                     on_synced=on_synced)
+        except BaseException:
+            if cache is not None:
+                cache.discard()
+            raise
+        if cache is not None and save_cache:
+            # pages whose roster was not stored (e.g. an empty page) are
+            # fetched again next time
+            cache.discard()
+
+        # Create place in db for location of Stadiums
+        add_lat_lng_columns(db_path)
+        if previous_db:
+            # what a fresh build doesn't scrape is carried over, so only
+            # new stadiums are geocoded and new players enriched
+            copy_coordinates(previous_db, db_path)
+            copy_profiles(conn, previous_db)
+            copy_trivia_bank(conn, previous_db)
+        geocode_and_update_teams(db_path)  # Add coordonites to teams
+        if enrich:
+            enrich_players(conn, max_workers=max_workers, rate=api_rate,
+                           refresh=refresh_profiles)
+        # Fold the WAL back into the database now that the load is done
+        checkpoint(conn)
+    return cache
+
+
+# Carry what the scrape doesn't rebuild over from a previous database
+
+def _attached(conn, source_db, what, statements):
+    """Run statements with source_db attached as "previous"."""
+    conn.execute("ATTACH DATABASE ? AS previous", (str(source_db),))
+    try:
+        with conn:
+            for statement in statements:
+                conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        if "no such" not in str(e):
+            raise
+        print(f"No {what} to copy from {source_db}: {e}")
+    finally:
+        conn.execute("DETACH DATABASE previous")
+
+
+def copy_profiles(conn, source_db):
+    """
+    Give players that have no profile yet the one stored for the same
+    name on the same team (by url name) in source_db.
+    """
+    _attached(conn, source_db, "profiles", [
+        "DROP TABLE IF EXISTS temp.profile_map",
+        """
+        CREATE TEMP TABLE profile_map AS
+        SELECT players.id AS new_id, MIN(old_players.id) AS old_id
+        FROM players
+        JOIN teams ON teams.id = players.team_id
+        JOIN previous.teams AS old_teams
+            ON old_teams.team_ext = teams.team_ext
+        JOIN previous.players AS old_players
+            ON old_players.team_id = old_teams.id
+           AND old_players.name = players.name
+        JOIN previous.player_profiles AS old_profiles
+            ON old_profiles.player_id = old_players.id
+        WHERE players.id NOT IN (SELECT player_id FROM player_profiles)
+        GROUP BY players.id
+        """,
+        """
+        INSERT INTO player_profiles (player_id, external_id, nationality,
+                                     date_born, position, fetched_at)
+        SELECT new_id, external_id, nationality, date_born, position,
+               fetched_at
+        FROM profile_map
+        JOIN previous.player_profiles ON player_id = old_id
+        """,
+        """
+        INSERT INTO player_former_teams (player_id, former_team, move_type,
+                                         joined, departed)
+        SELECT new_id, former_team, move_type, joined, departed
+        FROM profile_map
+        JOIN previous.player_former_teams ON player_id = old_id
+        ORDER BY new_id, previous.player_former_teams.id
+        """,
+        """
+        INSERT INTO player_honors (player_id, honour, team_name, year)
+        SELECT new_id, honour, team_name, year
+        FROM profile_map
+        JOIN previous.player_honors ON player_id = old_id
+        ORDER BY new_id, previous.player_honors.id
+        """,
+        "DROP TABLE temp.profile_map",
+    ])
+
+
+def copy_trivia_bank(conn, source_db):
+    """
+    Copy source_db's banked questions to the same teams (by url name)
+    for teams that have no bank yet. Run trivia_bank.py to refresh them.
+    """
+    _attached(conn, source_db, "trivia bank", ["""
+        INSERT INTO trivia_questions (team_id, slot, question,
+                                      correct_answer, choices, image_url)
+        SELECT teams.id, old_questions.slot, old_questions.question,
+               old_questions.correct_answer, old_questions.choices,
+               old_questions.image_url
+        FROM previous.trivia_questions AS old_questions
+        JOIN previous.teams AS old_teams
+            ON old_teams.id = old_questions.team_id
+        JOIN teams ON teams.team_ext = old_teams.team_ext
+        WHERE teams.id NOT IN (SELECT team_id FROM trivia_questions)
+    """])
+
+
+# Build a whole new database next to the live one and swap it in
+
+def validate_db(path, min_teams=MIN_TEAMS):
+    """
+    Check a freshly built database before it goes live: enough teams,
+    every team has players and every stadium has coordinates.
+    Raises ValueError listing every problem found.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        teams = conn.execute("SELECT COUNT(*) FROM teams").fetchone()[0]
+        empty = [name for (name,) in conn.execute("""
+            SELECT name FROM teams WHERE id NOT IN
+                (SELECT DISTINCT team_id FROM players)
+        """)]
+        unplaced = [name for (name,) in conn.execute("""
+            SELECT name FROM teams
+            WHERE latitude IS NULL OR longitude IS NULL
+        """)]
+    finally:
+        conn.close()
+
+    problems = []
+    if teams < min_teams:
+        problems.append(f"only {teams} teams (expected {min_teams})")
+    if empty:
+        problems.append(f"teams without players: {', '.join(empty)}")
+    if unplaced:
+        problems.append(f"teams without coordinates: {', '.join(unplaced)}")
+    if problems:
+        raise ValueError("Database build failed validation: "
+                         + "; ".join(problems))
+
+
+def _remove_db_files(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def _empty_live_wal(target):
+    """
+    Checkpoint the live database and empty its WAL, so nothing in it
+    outlives the old file. Retries while readers keep the checkpoint
+    from finishing, then raises RuntimeError.
+    """
+    delay = SWAP_RETRY_DELAY
+    for attempt in range(SWAP_RETRIES + 1):
+        with writer(target) as live:
+            busy, _, _ = checkpoint(live)
+        if not busy:
+            return
+        if attempt < SWAP_RETRIES:
+            time.sleep(delay)
+            delay *= 2
+    raise RuntimeError(f"{target} stayed busy, the new build was not "
+                       "swapped in")
+
+
+def build_and_swap(target=None, min_teams=MIN_TEAMS, **options):
+    """
+    Run the whole pipeline into a new file in the target's directory,
+    validate it and atomically rename it over the target. Coordinates,
+    player profiles and the trivia bank are carried over from the
+    target. The live database is never modified, so a failed or slow
+    run changes nothing, not even the page cache; readers switch to the
+    new file on their next connection. options are passed on to main().
+    """
+    target = os.path.abspath(target or live_db())
+    fd, build_path = tempfile.mkstemp(prefix=".build-", suffix=".db",
+                                      dir=os.path.dirname(target))
+    os.close(fd)
+    cache = None
+    try:
+        cache = main(db_path=build_path,
+                     previous_db=target if os.path.exists(target) else None,
+                     save_cache=False, **options)
+        validate_db(build_path, min_teams=min_teams)
+
+        # The new file stays in WAL mode, with its WAL folded in and
+        # removed so the file stands alone
+        conn = connect(build_path)
+        enable_wal(conn)
+        busy, _, _ = checkpoint(conn)
+        conn.close()
+        if busy or os.path.exists(build_path + "-wal"):
+            raise RuntimeError(f"could not fold the WAL into {build_path}")
+        if os.path.exists(target):
+            _empty_live_wal(target)
+
+        os.replace(build_path, target)
+    except BaseException:
+        _remove_db_files(build_path)
+        if cache is not None:
+            cache.discard()
+        raise
+    if cache is not None:
+        # the pages are only the cached ones once their rosters are live
+        cache.save()
+
 
-    conn = create_db()
-    insert_teams_and_players(conn, teams_data)
-    add_lat_lng_columns()  # Create place in db for location of Stadiums
-    geocode_and_update_teams()  # Add coordonites to teams
-    conn.close()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrape MLB teams and rosters into the database")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="roster pages fetched at once (1 = serial)")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help="max requests in flight to a single host")
+    parser.add_argument("--cache-dir", default=None,
+                        help="keep pages here and skip unchanged rosters")
+    parser.add_argument("--no-enrich", dest="enrich", action="store_false",
+                        help="skip fetching player profiles from the API")
+    parser.add_argument("--api-rate", type=float, default=DEFAULT_API_RATE,
+                        help="player API calls per second")
+    parser.add_argument("--refresh-profiles", action="store_true",
+                        help="re-fetch profiles that are already stored")
+    parser.add_argument("--swap", action="store_true",
+                        help="build a new database, validate it and swap "
+                             "it in instead of updating the live one")
+    parser.add_argument("--min-teams", type=int, default=MIN_TEAMS,
+                        help="teams a --swap build needs to go live")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    options = dict(max_workers=args.workers, per_host=args.per_host,
+                   cache_dir=args.cache_dir, enrich=args.enrich,
+                   api_rate=args.api_rate,
+                   refresh_profiles=args.refresh_profiles)
+    if args.swap:
+        build_and_swap(min_teams=args.min_teams, **options)
+    else:
+        main(**options)
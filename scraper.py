@@ -1,13 +1,32 @@
 # This Module runs the Scrape
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
+import requests
+import http_client
+
+ROSTER_URL = "https://www.mlb.com/{team_ext}/roster"
+
+# Default size of the worker pool and how many requests may be in flight
+# against the same host at once (keep mlb.com happy)
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = http_client.POOL_MAXSIZE
 
 """ Scrape team and team details from mlb.com/teams"""
 
 
-def scrape_teams(url):
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
+def scrape_teams(url, cache=None):
+    # The team list is always parsed, the rosters depend on it, so its
+    # page can be saved as soon as it is fetched
+    if cache is not None:
+        content, _ = cache.fetch(url)
+        cache.save(url)
+    else:
+        response = http_client.get(url)
+        response.raise_for_status()
+        content = response.content
+    soup = BeautifulSoup(content, "html.parser")
     teams_data = []
 
     all_teams = soup.find_all('div', class_='p-forge-list-item')
@@ -54,9 +73,29 @@ def scrape_teams(url):
 """For each team Scrape the Players from that teams Roster Page"""
 
 
-def scrape_players(team_ext):
-    page = requests.get(f"https://www.mlb.com/{team_ext}/roster")
-    soup = BeautifulSoup(page.content, "html.parser")
+def scrape_players(team_ext, cache=None):
+    """
+    Scrape one roster page. Returns None when the page could not be
+    fetched (an error status after the retries, or no connection) and,
+    with a ResponseCache, when it has not changed since the last run,
+    so the caller leaves that team's stored roster as it is. A changed
+    page stays pending in the cache until the caller has stored the
+    roster and saves it.
+    """
+    url = ROSTER_URL.format(team_ext=team_ext)
+    try:
+        if cache is not None:
+            content, changed = cache.fetch(url)
+            if not changed:
+                return None
+        else:
+            response = http_client.get(url)
+            response.raise_for_status()
+            content = response.content
+    except requests.RequestException as e:
+        print(f"Could not fetch the roster at {url}: {e}")
+        return None
+    soup = BeautifulSoup(content, "html.parser")
     players_data = []
 
     all_players = soup.find_all('tr')
@@ -78,3 +117,34 @@ def scrape_players(team_ext):
             })
 
     return players_data
+
+
+"""Scrape many Roster Pages at once with a bounded pool of workers"""
+
+
+def scrape_all_players(team_exts, player_scraper=scrape_players,
+                       max_workers=DEFAULT_WORKERS,
+                       per_host=DEFAULT_PER_HOST):
+    """
+    Fetch and parse the roster of every team concurrently.
+    Returns a dict of team_ext -> list of players (or None when the
+    scraper reports the roster unchanged), in the same order as team_exts.
+    At most per_host requests hit a single host at once.
+    """
+    host_limits = {}
+    lock = threading.Lock()
+
+    def limit_for(team_ext):
+        host = urlparse(ROSTER_URL.format(team_ext=team_ext)).netloc
+        with lock:
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(per_host)
+            return host_limits[host]
+
+    def fetch(team_ext):
+        with limit_for(team_ext):
+            return player_scraper(team_ext)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(fetch, team_exts)
+        return dict(zip(team_exts, results))
@@ -0,0 +1,194 @@
+# This module fills a database with a made-up league for scale testing
+import argparse
+import os
+import random
+from connections import enable_wal, checkpoint, writer
+from database import create_tables, bulk_load, save_player_profiles
+from data_displays import add_lat_lng_columns
+
+DEFAULT_TEAMS = 1000
+DEFAULT_PLAYERS = 40
+DEFAULT_BATCH_SIZE = 50000
+
+CITIES = ["Austin", "Boise", "Charlotte", "Denver", "El Paso", "Fresno",
+          "Greenville", "Honolulu", "Indianapolis", "Jackson", "Knoxville",
+          "Louisville", "Memphis", "Nashville", "Omaha", "Portland",
+          "Reno", "Spokane", "Tulsa", "Wichita"]
+MASCOTS = ["Aces", "Bison", "Comets", "Drillers", "Express", "Falcons",
+           "Grizzlies", "Hawks", "Isotopes", "Jays", "Knights", "Lugnuts",
+           "Mudcats", "Nighthawks", "Owls", "Pioneers", "Rattlers",
+           "Storm", "Thunder", "Wolves"]
+FIRST_NAMES = ["Aaron", "Brandon", "Carlos", "Derek", "Eli", "Freddie",
+               "Gleyber", "Hunter", "Ichiro", "Jose", "Kyle", "Luis",
+               "Mookie", "Nolan", "Ozzie", "Pete", "Rafael", "Shohei",
+               "Trea", "Vladimir", "Will", "Yordan", "Zack"]
+LAST_NAMES = ["Alvarez", "Betts", "Cabrera", "Devers", "Estrada", "Freeman",
+              "Garcia", "Harper", "Iglesias", "Judge", "Kershaw", "Lindor",
+              "Machado", "Nimmo", "Ohtani", "Perez", "Ramirez", "Soto",
+              "Trout", "Urias", "Valdez", "Walker", "Yelich"]
+NATIONALITIES = ["USA", "Dominican Republic", "Venezuela", "Cuba", "Japan",
+                 "Puerto Rico", "Mexico", "Canada", "South Korea"]
+POSITIONS = ["Pitcher", "Catcher", "First Base", "Second Base",
+             "Third Base", "Shortstop", "Outfielder",
+             "Designated Hitter"]
+HONOURS = ["MVP", "Cy Young Award", "Gold Glove", "Silver Slugger",
+           "All-Star", "Rookie of the Year", "World Series Champion"]
+
+
+def make_teams(n_teams, seed=0):
+    """Team dicts shaped like scraper.scrape_teams() results."""
+    rng = random.Random(f"{seed}-teams")
+    teams = []
+    for i in range(n_teams):
+        name = f"{rng.choice(CITIES)} {rng.choice(MASCOTS)} {i}"
+        ext = f"synthetic-{i}"
+        teams.append({
+            "team_name": name,
+            "logo_url": f"https://example.com/logos/{ext}.svg",
+            "stadium": f"{name} Park",
+            "stadium_addr": f"{i} Ballpark Way, {rng.choice(CITIES)}",
+            "phone": f"(555) {i // 10000 % 1000:03}-{i % 10000:04}",
+            "team_ext": ext
+        })
+    return teams
+
+
+class SyntheticRosters:
+    """
+    Stands in for the team_ext -> roster dict bulk_load() takes. Each
+    roster is made (from the seed, so always the same) when it is asked
+    for, so millions of players never sit in memory at once.
+    """
+
+    def __init__(self, players_per_team, seed=0):
+        self.players_per_team = players_per_team
+        self.seed = seed
+
+    def get(self, team_ext, default=None):
+        rng = random.Random(f"{self.seed}-{team_ext}")
+        roster = []
+        for i in range(self.players_per_team):
+            # a few players have no number, like on the real site
+            jersey = "" if rng.random() < 0.02 else str(rng.randint(0, 99))
+            roster.append({
+                "player_name": f"{rng.choice(FIRST_NAMES)} "
+                               f"{rng.choice(LAST_NAMES)}",
+                "jersey_number": jersey,
+                "headshot_url": f"https://example.com/headshots/"
+                                f"{team_ext}/{i}.png"
+            })
+        return roster
+
+
+def make_profile(rng, player_id, team_names, former_teams=2, honors=2):
+    """(player_id, info, former_teams, honors) for save_player_profiles()."""
+    info = {
+        "idPlayer": str(1000000 + player_id),
+        "strNationality": rng.choice(NATIONALITIES),
+        "dateBorn": f"{rng.randint(1980, 2004)}-{rng.randint(1, 12):02}-"
+                    f"{rng.randint(1, 28):02}",
+        "strPosition": rng.choice(POSITIONS)
+    }
+    moves = []
+    for _ in range(rng.randint(0, former_teams)):
+        joined = rng.randint(2005, 2022)
+        moves.append({
+            "former_team": rng.choice(team_names),
+            "move_type": rng.choice(["Permanent", "Loan", "Trade"]),
+            "joined": str(joined),
+            "departed": str(joined + rng.randint(1, 4))
+        })
+    honours = [
+        {"honour": rng.choice(HONOURS), "team_name": rng.choice(team_names),
+         "year": str(rng.randint(2005, 2024))}
+        for _ in range(rng.randint(0, honors))
+    ]
+    return player_id, info, moves, honours
+
+
+def add_profiles(conn, team_names, seed=0, batch_size=DEFAULT_BATCH_SIZE,
+                 former_teams=2, honors=2):
+    """Give every player a profile, batch_size players per transaction."""
+    rng = random.Random(f"{seed}-profiles")
+    last_id = 0
+    saved = 0
+    while True:
+        ids = [player_id for (player_id,) in conn.execute(
+            "SELECT id FROM players WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size))]
+        if not ids:
+            return saved
+        save_player_profiles(conn, (
+            make_profile(rng, player_id, team_names, former_teams, honors)
+            for player_id in ids
+        ))
+        saved += len(ids)
+        last_id = ids[-1]
+
+
+def add_coordinates(conn, db_path, seed=0):
+    """Place every stadium somewhere in the continental US."""
+    add_lat_lng_columns(db_path)
+    rng = random.Random(f"{seed}-coordinates")
+    with conn:
+        conn.executemany(
+            "UPDATE teams SET latitude = ?, longitude = ? WHERE id = ?",
+            [(round(rng.uniform(25.0, 49.0), 6),
+              round(rng.uniform(-124.0, -67.0), 6), team_id)
+             for (team_id,) in conn.execute("SELECT id FROM teams")]
+        )
+
+
+def generate_league(db_path, n_teams=DEFAULT_TEAMS,
+                    players_per_team=DEFAULT_PLAYERS, seed=0,
+                    profiles=True, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Build a synthetic league in a new database through the same
+    create_tables / bulk_load / save_player_profiles paths as the
+    scraper, as one writer(). The same seed always gives the same league.
+    Returns (teams, players) written.
+    """
+    with writer(db_path) as conn:
+        create_tables(conn)
+        enable_wal(conn)
+
+        teams = make_teams(n_teams, seed=seed)
+        written = bulk_load(conn, teams,
+                            SyntheticRosters(players_per_team, seed=seed),
+                            batch_size=batch_size)
+        add_coordinates(conn, db_path, seed=seed)
+        if profiles:
+            add_profiles(conn, [team["team_name"] for team in teams],
+                         seed=seed, batch_size=batch_size)
+
+        checkpoint(conn)
+    return len(teams), written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic league database for scale tests")
+    parser.add_argument("db_path", help="database file to create")
+    parser.add_argument("--teams", type=int, default=DEFAULT_TEAMS,
+                        help="number of teams")
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYERS,
+                        help="players on each team")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="same seed, same league")
+    parser.add_argument("--no-profiles", dest="profiles",
+                        action="store_false",
+                        help="skip player profiles, former teams and honors")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="rows written per transaction")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if os.path.exists(args.db_path):
+        raise SystemExit(f"{args.db_path} already exists, "
+                         "pick a new file for the synthetic league")
+    teams, players = generate_league(
+        args.db_path, n_teams=args.teams, players_per_team=args.players,
+        seed=args.seed, profiles=args.profiles, batch_size=args.batch_size)
+    print(f"Wrote {teams} teams and {players} players to {args.db_path}")
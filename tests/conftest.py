@@ -0,0 +1,99 @@
+from urllib.parse import urlparse
+import pytest
+import requests
+import ai
+import api
+import connections
+import database
+from database import create_db
+import http_client
+import intent_router
+from ttl_cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def no_http_backoff():
+    """Retry without sleeping so unit tests never wait on backoff."""
+    http_client.configure(backoff_factor=0)
+    yield
+    http_client.configure(backoff_factor=http_client.BACKOFF_FACTOR)
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    """
+    Fail any request to a real host the way a dropped connection would,
+    so no test depends on (or waits for) the network. Stand-in servers
+    on localhost are still reached.
+    """
+    local_get = http_client.get
+
+    def get(url, **kwargs):
+        if urlparse(url).hostname not in ("127.0.0.1", "localhost"):
+            raise requests.ConnectionError(f"tests are offline: {url}")
+        return local_get(url, **kwargs)
+
+    monkeypatch.setattr(http_client, "get", get)
+
+
+@pytest.fixture(autouse=True)
+def fresh_api_cache(monkeypatch):
+    """Give every test its own empty in-memory API cache."""
+    monkeypatch.setattr(api, "_cache", TTLCache(":memory:"))
+
+
+@pytest.fixture(autouse=True)
+def fresh_answer_cache(monkeypatch):
+    """Give every test its own empty in-memory Ump answer cache."""
+    monkeypatch.setattr(ai, "_answers",
+                        TTLCache(":memory:", max_entries=ai.ANSWER_CACHE_SIZE))
+
+
+@pytest.fixture(autouse=True)
+def fresh_roster_cache():
+    """Don't let cached teams, rosters or aliases leak between tests."""
+    database.clear_cache()
+    intent_router.clear_aliases()
+    yield
+    database.clear_cache()
+    intent_router.clear_aliases()
+
+
+@pytest.fixture(autouse=True)
+def default_connections():
+    """
+    Read straight from the file (whatever MLB_DB_SNAPSHOT says) and reset
+    the connection pool and database path after each test.
+    """
+    connections.configure(snapshot=False)
+    yield
+    connections.configure(db_path=connections.DEFAULT_DB_PATH,
+                          pragmas=connections.DEFAULT_PRAGMAS,
+                          snapshot=False)
+
+
+@pytest.fixture
+def league(tmp_path):
+    """
+    Three teams (the White Sox without a phone) and four players, for
+    the intent router and the Ump's tools.
+    """
+    db_path = tmp_path / "mlb.db"
+    conn = create_db(db_path)
+    conn.executemany(
+        "INSERT INTO teams (name, stadium, stadium_addr, phone, team_ext) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [("New York Yankees", "Yankee Stadium", "1 E 161st St Bronx",
+          "Phone: (718) 293-4300", "/yankees"),
+         ("Boston Red Sox", "Fenway Park", "4 Jersey Street Boston",
+          "Phone: (877) 733-7699", "/redsox"),
+         ("Chicago White Sox", "Rate Field", "333 W 35th St Chicago",
+          None, "/whitesox")])
+    conn.executemany(
+        "INSERT INTO players (team_id, name, jersey_number) VALUES (?, ?, ?)",
+        [(1, "Aaron Judge", "99"), (1, "Anthony Volpe", "11"),
+         (2, "Rafael Devers", "11"), (2, "Trevor Story", "")])
+    conn.commit()
+    connections.configure(db_path=db_path)
+    yield conn
+    conn.close()
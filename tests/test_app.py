@@ -1,5 +1,4 @@
 from unittest.mock import patch, MagicMock
-import pandas as pd
 import streamlit as st
 import app
 import api
@@ -28,9 +27,8 @@ def test_sidebar_updates_session_state(mocker):
 
 
 def test_team_dropdown_select_sets_team(mocker):
-    teams_df = MagicMock()
-    teams_df.iterrows.return_value = iter([(0, {'name': 'Yankees', 'id': 1})])
-    mocker.patch("app.get_all_teams", return_value=teams_df)
+    mocker.patch("app.fetch_all_teams",
+                 return_value=[{'name': 'Yankees', 'id': 1}])
     mocker.patch("app.st.selectbox", return_value="Yankees")
     mocker.patch("app.st.rerun")
 
@@ -59,7 +57,7 @@ def test_team_info_displays_if_team_selected(mocker):
     st.session_state["selected_team"] = 1
 
     mocker.patch(
-        "app.get_team_by_id",
+        "app.fetch_team",
         return_value={
             "name": "Yankees",
             "stadium": "Yankee Stadium",
@@ -78,7 +76,7 @@ def test_team_info_displays_if_team_selected(mocker):
     )
 
     app.get_selected_team = lambda: 1
-    app.team = app.get_team_by_id(1)
+    app.team = app.fetch_team(1)
     assert app.team["name"] == "Yankees"
 
 
@@ -89,10 +87,11 @@ def test_players_page_loads_and_fetches_data(mocker):
         "player_details_shown": {}
     })
 
-    mocker.patch("app.get_team_by_id", return_value={"name": "Yankees"})
-    mocker.patch("app.get_players_by_team_id", return_value=pd.DataFrame([{
-        "name": "John Doe", "jersey_number": 99, "headshot_url": "some_url"
-    }]))
+    mocker.patch("app.fetch_team", return_value={"name": "Yankees"})
+    mocker.patch("app.fetch_players", return_value=[{
+        "id": 1, "name": "John Doe", "jersey_number": 99,
+        "headshot_url": "some_url"
+    }])
     mocker.patch("api.get_player_info", return_value={"idPlayer": 123})
     mocker.patch("api.get_player_honors", return_value=[])
     mocker.patch("api.get_player_teams", return_value=[])
@@ -119,10 +118,11 @@ def test_player_expander_opens_and_shows_data(mocker):
         "player_details_shown": {}
     })
 
-    mocker.patch("app.get_team_by_id", return_value={"name": "Yankees"})
-    mocker.patch("app.get_players_by_team_id", return_value=pd.DataFrame([{
-        "name": "John Doe", "jersey_number": 99, "headshot_url": "url"
-    }]))
+    mocker.patch("app.fetch_team", return_value={"name": "Yankees"})
+    mocker.patch("app.fetch_players", return_value=[{
+        "id": 1, "name": "John Doe", "jersey_number": 99,
+        "headshot_url": "url"
+    }])
     mocker.patch("api.get_player_info", return_value={
         "idPlayer": 123,
         "dateBorn": "1990-01-01",
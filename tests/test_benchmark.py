@@ -0,0 +1,55 @@
+import json
+from unittest import mock
+import pytest
+import benchmark
+
+
+def run_once(func, repeat):
+    func()
+    return 0.001
+
+
+@pytest.fixture
+def fast_timing():
+    # call each benchmark once instead of timing it
+    with mock.patch("benchmark.time_call", side_effect=run_once):
+        yield
+
+
+def test_run_covers_every_benchmark(fast_timing, tmp_path):
+    # trivia needs four teams and four players to pick choices from
+    report = benchmark.run(sizes=[4, 6], players=5, repeat=1,
+                           work_dir=tmp_path)
+    results = report["results"]
+    for size in (4, 6):
+        for name in ("get_all_teams", "get_players_by_team_id",
+                     "players_by_jersey", "get_random_trivia_question",
+                     "route", "run_tool"):
+            assert f"{name}[{size}]" in results
+    assert "scrape_players[roster.html]" in results
+    assert "build_prompt" in results
+    assert report["meta"]["sizes"] == [4, 6]
+
+
+def test_compare_flags_regressions():
+    rows, regressions = benchmark.compare(
+        {"a": 0.002, "b": 0.004, "new": 0.001},
+        {"a": 0.002, "b": 0.002}, tolerance=1.5)
+    assert regressions == ["b"]
+    assert rows[2] == ("new", 0.001, None, None)
+
+
+def test_main_fails_against_faster_baseline(fast_timing, tmp_path, capsys):
+    output = tmp_path / "results.json"
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "4", "--players", "5", "--output", str(output),
+            "--baseline", str(baseline)]
+
+    assert benchmark.main(args + ["--save-baseline"]) == 0
+    assert benchmark.main(args) == 0
+
+    stored = json.loads(baseline.read_text())
+    stored["results"]["get_all_teams[4]"] = 0.0001
+    baseline.write_text(json.dumps(stored))
+    assert benchmark.main(args) == 1
+    assert "get_all_teams[4]" in capsys.readouterr().out
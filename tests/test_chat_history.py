@@ -0,0 +1,63 @@
+from chat_history import (ChatHistory, summarize_message, message_tokens,
+                          SUMMARY_LINE_CHARS)
+
+
+def chat(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}?"})
+        messages.append({"role": "assistant",
+                         "content": f"Answer {i}. More detail."})
+    return messages
+
+
+def test_summarize_message_keeps_first_sentence():
+    line = summarize_message({"role": "assistant",
+                              "content": "Three strikes.\nThen you're out."})
+    assert line == "Ump: Three strikes."
+    line = summarize_message({"role": "user", "content": "x" * 500})
+    assert line.startswith("Fan: xxx") and line.endswith("...")
+    assert len(line) == len("Fan: ") + SUMMARY_LINE_CHARS
+
+
+def test_short_chat_is_sent_whole():
+    messages = chat(2) + [{"role": "user", "content": "Question 2?"}]
+    assert ChatHistory(keep_turns=4).prompt_messages(messages) == messages
+
+
+def test_old_turns_are_summarized():
+    history = ChatHistory(keep_turns=2)
+    messages = chat(5) + [{"role": "user", "content": "Question 5?"}]
+
+    sent = history.prompt_messages(messages)
+    assert sent[0]["role"] == "system"
+    assert sent[0]["content"].splitlines() == [
+        "Earlier in this chat:",
+        "Fan: Question 0?", "Ump: Answer 0.",
+        "Fan: Question 1?", "Ump: Answer 1.",
+        "Fan: Question 2?", "Ump: Answer 2.",
+    ]
+    assert sent[1:] == messages[-5:]
+
+
+def test_budgets_hold_however_long_the_chat():
+    history = ChatHistory(keep_turns=3, token_budget=60, summary_tokens=30)
+    messages = []
+    for i in range(200):
+        messages += [{"role": "user", "content": f"Question {i}? " * 3},
+                     {"role": "assistant", "content": f"Answer {i}. " * 5}]
+        sent = history.prompt_messages(
+            messages + [{"role": "user", "content": "Next?"}])
+        summary, recent = sent[0], sent[1:]
+        assert sum(message_tokens(m) for m in recent) <= 60
+        assert summary["content"].count("\n") <= 8
+    # the newest turns are the ones kept
+    assert recent[-1]["content"] == "Next?"
+    assert "Answer 199" in recent[-2]["content"]
+
+
+def test_new_chat_resets_summary():
+    history = ChatHistory(keep_turns=1)
+    history.prompt_messages(chat(4))
+    assert history.summary
+    assert history.prompt_messages(chat(1)) == chat(1)
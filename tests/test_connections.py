@@ -0,0 +1,198 @@
+import gc
+import os
+import sqlite3
+import threading
+import time
+import pytest
+import connections
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "mlb.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("INSERT INTO teams (name) VALUES ('Team A')")
+    conn.commit()
+    conn.close()
+    connections.configure(db_path=path)
+    return path
+
+
+def in_thread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_read_connection_reused_in_thread(db):
+    conn = connections.get_read_connection()
+    assert connections.get_read_connection() is conn
+    assert conn.execute("SELECT name FROM teams").fetchone() == ("Team A",)
+
+
+def test_threads_get_own_connection_and_return_it(db):
+    mine = connections.get_read_connection()
+    theirs = in_thread(connections.get_read_connection)
+    assert theirs is not mine
+
+    gc.collect()
+    # the finished thread's connection is handed to the next thread
+    assert in_thread(connections.get_read_connection) is theirs
+
+
+def test_read_connection_is_read_only(db):
+    with pytest.raises(sqlite3.OperationalError):
+        connections.get_read_connection().execute("DELETE FROM teams")
+
+
+def test_pragmas_are_applied(db):
+    connections.configure(pragmas={"busy_timeout": 1234})
+    conn = connections.get_read_connection()
+    assert conn.execute("PRAGMA busy_timeout").fetchone() == (1234,)
+
+
+def test_configure_switches_database(db, tmp_path):
+    old = connections.get_read_connection()
+    other = tmp_path / "other.db"
+    sqlite3.connect(other).close()
+    connections.configure(db_path=other)
+    assert connections.db_path() == str(other)
+    assert connections.get_read_connection() is not old
+
+
+def test_writer_commits_and_rolls_back(db):
+    with connections.writer() as conn:
+        conn.execute("INSERT INTO teams (name) VALUES ('Team B')")
+    with pytest.raises(ValueError):
+        with connections.writer() as conn:
+            conn.execute("INSERT INTO teams (name) VALUES ('Team C')")
+            raise ValueError("boom")
+
+    names = connections.get_read_connection().execute(
+        "SELECT name FROM teams ORDER BY id").fetchall()
+    assert names == [("Team A",), ("Team B",)]
+
+
+def test_writers_are_serialized(db):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def write():
+        nonlocal active, peak
+        with connections.writer() as conn:
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            conn.execute("INSERT INTO teams (name) VALUES ('x')")
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 1
+
+
+def test_wal_readers_not_blocked_by_writer(db):
+    load = connections.connect()
+    assert connections.enable_wal(load) == "wal"
+
+    load.execute("BEGIN IMMEDIATE")
+    load.execute("DELETE FROM teams")
+    load.execute("INSERT INTO teams (name) VALUES ('Half loaded')")
+
+    # mid-load the reader sees the last committed data, without waiting
+    reader = connections.get_read_connection()
+    start = time.monotonic()
+    assert reader.execute("SELECT name FROM teams").fetchall() == [
+        ("Team A",)]
+    assert time.monotonic() - start < 1
+
+    load.commit()
+    assert reader.execute("SELECT name FROM teams").fetchall() == [
+        ("Half loaded",)]
+
+    busy, _, _ = connections.checkpoint(load)
+    assert busy == 0
+    load.close()
+
+
+def test_snapshot_serves_reads_from_memory(db):
+    connections.configure(snapshot=True)
+    conn = connections.get_read_connection()
+    # the main database of the connection has no file behind it
+    assert conn.execute("PRAGMA database_list").fetchone()[2] == ""
+    assert conn.execute("SELECT name FROM teams").fetchall() == [
+        ("Team A",)]
+    assert in_thread(lambda: connections.get_read_connection().execute(
+        "SELECT COUNT(*) FROM teams").fetchone()) == (1,)
+    assert connections.get_read_connection() is conn
+
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM teams")
+
+
+def test_snapshot_reloads_when_file_changes(db, monkeypatch):
+    monkeypatch.setattr(connections, "SNAPSHOT_CHECK_INTERVAL", 0)
+    connections.configure(snapshot=True)
+    old = connections.get_read_connection()
+
+    with connections.writer() as conn:
+        conn.execute("INSERT INTO teams (name) VALUES ('Team B')")
+    os.utime(db, ns=(0, 0))
+
+    new = connections.get_read_connection()
+    assert new is not old
+    assert new.execute("SELECT name FROM teams ORDER BY id").fetchall() == [
+        ("Team A",), ("Team B",)]
+
+
+def test_checkpoint_rejects_unknown_mode(db):
+    with pytest.raises(ValueError):
+        connections.checkpoint(connections.connect(), mode="NOW")
+
+
+def test_retry_locked(monkeypatch):
+    monkeypatch.setattr(connections, "READ_RETRY_DELAY", 0)
+    calls = []
+
+    @connections.retry_locked
+    def read():
+        calls.append(1)
+        if len(calls) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "rows"
+
+    assert read() == "rows"
+    assert len(calls) == 3
+
+
+def test_retry_locked_gives_up_and_ignores_other_errors(monkeypatch):
+    monkeypatch.setattr(connections, "READ_RETRY_DELAY", 0)
+    calls = []
+
+    @connections.retry_locked
+    def locked():
+        calls.append(1)
+        raise sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(sqlite3.OperationalError):
+        locked()
+    assert len(calls) == connections.READ_RETRIES + 1
+
+    @connections.retry_locked
+    def broken():
+        calls.append(1)
+        raise sqlite3.OperationalError("no such table: teams")
+
+    calls.clear()
+    with pytest.raises(sqlite3.OperationalError):
+        broken()
+    assert len(calls) == 1
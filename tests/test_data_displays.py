@@ -3,8 +3,12 @@ import pytest
 from unittest import mock
 from data_displays import (
     add_lat_lng_columns,
-    geocode_and_update_teams
+    copy_coordinates,
+    geocode_and_update_teams,
+    jersey_distribution,
+    players_by_jersey
 )
+from database import migrate_db
 
 
 @pytest.fixture
@@ -55,6 +59,28 @@ def test_add_lat_lng_columns(temp_db):
     assert 'longitude' in columns
 
 
+def test_copy_coordinates(temp_db, tmp_path):
+    source = tmp_path / "old.db"
+    conn = sqlite3.connect(source)
+    conn.execute("""
+        CREATE TABLE teams (stadium_addr TEXT, latitude REAL, longitude REAL)
+    """)
+    conn.execute("""
+        INSERT INTO teams VALUES ('123 Main St, Anytown USA', 1.5, 2.5)
+    """)
+    conn.commit()
+    conn.close()
+
+    copy_coordinates(source, temp_db)
+
+    conn = sqlite3.connect(temp_db)
+    rows = conn.execute(
+        "SELECT latitude, longitude FROM teams ORDER BY id").fetchall()
+    conn.close()
+    # only the stadium at a known address is filled in
+    assert rows == [(1.5, 2.5), (None, None)]
+
+
 def test_geocode_and_update_teams():
     mock_location = mock.Mock()
     mock_location.latitude = 40.0
@@ -91,3 +117,45 @@ def test_geocode_and_update_teams():
 
         # Check that commit was called
         mock_conn.commit.assert_called_once()
+
+
+@pytest.fixture
+def jersey_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("""
+        CREATE TABLE players (
+            id INTEGER PRIMARY KEY, team_id INTEGER, name TEXT,
+            jersey_number TEXT, headshot_url TEXT
+        )
+    """)
+    migrate_db(conn)
+    conn.execute("INSERT INTO teams VALUES (1, 'Team A')")
+    conn.executemany(
+        "INSERT INTO players (team_id, name, jersey_number, headshot_url) "
+        "VALUES (1, ?, ?, 'url')",
+        [("P1", "7"), ("P2", "7"), ("P3", "12"), ("P4", "")]
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_jersey_distribution_counts_numbers(jersey_db):
+    with mock.patch("streamlit.bar_chart") as mock_chart:
+        jersey_distribution(jersey_db)
+    counts = mock_chart.call_args[0][0]
+    assert counts.to_dict() == {7: 2, 12: 1}
+
+
+def test_players_by_jersey_matches_integer(jersey_db):
+    with mock.patch("streamlit.slider", return_value=7), \
+            mock.patch("streamlit.markdown") as mock_markdown, \
+            mock.patch("streamlit.columns",
+                       return_value=[mock.MagicMock() for _ in range(4)]), \
+            mock.patch("streamlit.image"), \
+            mock.patch("streamlit.caption"):
+        players_by_jersey(jersey_db)
+    shown = [c[0][0] for c in mock_markdown.call_args_list]
+    assert "**P1**" in shown and "**P2**" in shown
+    assert "**P3**" not in shown
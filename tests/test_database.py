@@ -1,10 +1,15 @@
+import os
 import sqlite3
+from unittest.mock import patch
 import pytest
 import pandas as pd
+import connections
+import database
 from database import (
-    insert_teams_and_players,
+    insert_teams_and_players, sync_roster, bulk_load, create_db,
     get_all_teams, get_team_by_id,
-    get_players_by_team_id, get_team_name_by_id
+    get_players_by_team_id, get_team_name_by_id,
+    fetch_all_teams, fetch_team, fetch_team_name, fetch_players
 )
 
 # Sample data for tests
@@ -78,6 +83,178 @@ def test_insert_teams_and_players(in_memory_db, mock_scraper):
     assert players[0][2] == 'Jane Doe'
 
 
+def test_insert_teams_and_players_parallel(in_memory_db):
+    teams = [dict(TEST_TEAMS[0], team_name=f"Team {i}", team_ext=f"t{i}")
+             for i in range(5)]
+
+    def fake_scraper(team_ext):
+        return [dict(TEST_PLAYERS[0], player_name=f"{team_ext} player")]
+
+    insert_teams_and_players(in_memory_db, teams, player_scraper=fake_scraper,
+                             max_workers=4)
+    cur = in_memory_db.cursor()
+
+    cur.execute("""
+        SELECT teams.team_ext, players.name FROM players
+        JOIN teams ON teams.id = players.team_id ORDER BY teams.id
+    """)
+    assert cur.fetchall() == [(f"t{i}", f"t{i} player") for i in range(5)]
+
+
+def test_insert_teams_and_players_skips_unchanged_roster(in_memory_db,
+                                                         mock_scraper):
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=mock_scraper)
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=lambda team_ext: None)
+
+    cur = in_memory_db.cursor()
+    cur.execute("SELECT COUNT(*) FROM players")
+    assert cur.fetchone()[0] == 1
+
+
+def test_insert_teams_and_players_sync_is_idempotent(in_memory_db,
+                                                     mock_scraper):
+    for _ in range(3):
+        insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                                 player_scraper=mock_scraper, sync=True)
+
+    cur = in_memory_db.cursor()
+    cur.execute("SELECT COUNT(*) FROM teams")
+    assert cur.fetchone()[0] == 1
+    cur.execute("SELECT COUNT(*) FROM players")
+    assert cur.fetchone()[0] == 1
+
+
+def test_insert_teams_and_players_sync_updates_team(in_memory_db,
+                                                    mock_scraper):
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=mock_scraper, sync=True)
+    moved = [dict(TEST_TEAMS[0], stadium='New Stadium')]
+    insert_teams_and_players(in_memory_db, moved,
+                             player_scraper=mock_scraper, sync=True)
+
+    cur = in_memory_db.cursor()
+    cur.execute("SELECT id, stadium FROM teams")
+    assert cur.fetchall() == [(1, 'New Stadium')]
+
+
+def test_team_and_roster_are_one_transaction(in_memory_db, mock_scraper):
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=mock_scraper, sync=True)
+    moved = [dict(TEST_TEAMS[0], stadium='New Stadium')]
+    with patch("database.sync_roster",
+               side_effect=sqlite3.OperationalError("disk full")):
+        with pytest.raises(sqlite3.OperationalError):
+            insert_teams_and_players(in_memory_db, moved,
+                                     player_scraper=mock_scraper, sync=True)
+
+    # the team's new details went with the failed roster
+    cur = in_memory_db.cursor()
+    cur.execute("SELECT stadium FROM teams")
+    assert cur.fetchall() == [('Test Stadium',)]
+
+
+def test_sync_roster_applies_diff(in_memory_db, mock_scraper):
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=mock_scraper)
+    cur = in_memory_db.cursor()
+    cur.executemany(
+        "INSERT INTO players (team_id, name, jersey_number, headshot_url) "
+        "VALUES (1, ?, ?, NULL)",
+        [('Jane Doe', '7'), ('John Roe', '12'), ('Gone Guy', '3')]
+    )
+    in_memory_db.commit()
+
+    counts = sync_roster(in_memory_db, 1, [
+        {'player_name': 'Jane Doe', 'jersey_number': '7',
+         'headshot_url': 'http://image.test/player.png'},
+        {'player_name': 'John Roe', 'jersey_number': '21',
+         'headshot_url': None},
+        {'player_name': 'New Kid', 'jersey_number': '1',
+         'headshot_url': None},
+    ])
+
+    # one insert, one update, the extra Jane Doe and Gone Guy deleted
+    assert counts == (1, 1, 2)
+    cur.execute("SELECT name, jersey_number FROM players ORDER BY name")
+    assert cur.fetchall() == [
+        ('Jane Doe', '7'), ('John Roe', '21'), ('New Kid', '1')
+    ]
+
+
+@pytest.mark.parametrize("failed", [None, []])
+def test_failed_roster_fetch_keeps_players(in_memory_db, mock_scraper,
+                                           failed):
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=mock_scraper, sync=True)
+
+    insert_teams_and_players(in_memory_db, TEST_TEAMS,
+                             player_scraper=lambda team_ext: failed,
+                             sync=True)
+
+    assert sync_roster(in_memory_db, 1, failed) == (0, 0, 0)
+    cur = in_memory_db.cursor()
+    cur.execute("SELECT name FROM players")
+    assert cur.fetchall() == [('Jane Doe',)]
+
+
+class CountingConnection(sqlite3.Connection):
+    commits = 0
+
+    def commit(self):
+        self.commits += 1
+        super().commit()
+
+
+def make_league(n_teams, n_players):
+    teams = [dict(TEST_TEAMS[0], team_name=f"Team {i}", team_ext=f"t{i}")
+             for i in range(n_teams)]
+    rosters = {
+        team['team_ext']: [dict(TEST_PLAYERS[0], player_name=f"P{j}")
+                           for j in range(n_players)]
+        for team in teams
+    }
+    return teams, rosters
+
+
+def test_bulk_load_single_commit(tmp_path):
+    db_path = tmp_path / "bulk.db"
+    create_db(db_path).close()
+    conn = sqlite3.connect(db_path, factory=CountingConnection)
+    teams, rosters = make_league(3, 4)
+
+    written = bulk_load(conn, teams, rosters)
+
+    assert written == 12
+    assert conn.commits == 1
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT teams.team_ext, COUNT(*) FROM players
+        JOIN teams ON teams.id = players.team_id GROUP BY teams.team_ext
+    """)
+    assert dict(cur.fetchall()) == {"t0": 4, "t1": 4, "t2": 4}
+    conn.close()
+
+
+def test_bulk_load_batches_and_skips_unchanged(tmp_path):
+    db_path = tmp_path / "bulk.db"
+    create_db(db_path).close()
+    conn = sqlite3.connect(db_path, factory=CountingConnection)
+    teams, rosters = make_league(3, 4)
+    rosters["t1"] = None
+
+    written = bulk_load(conn, teams, rosters, batch_size=3)
+
+    assert written == 8
+    # three full/partial batches plus the final commit
+    assert conn.commits == 4
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM teams")
+    assert cur.fetchone()[0] == 3
+    conn.close()
+
+
 def test_get_team_name_by_id_with_conn(in_memory_db, mock_scraper):
     insert_teams_and_players(in_memory_db, TEST_TEAMS,
                              player_scraper=mock_scraper)
@@ -193,3 +370,113 @@ def test_get_players_by_team_id(monkeypatch, mock_scraper):
     df = get_players_by_team_id(1)
     assert not df.empty
     assert df.iloc[0]['name'] == 'Jane Doe'
+
+
+def test_roster_cache_reuses_until_db_changes(monkeypatch, tmp_path):
+    db_path = tmp_path / "mlb.db"
+    conn = create_db(db_path)
+    bulk_load(conn, *make_league(2, 3))
+    connections.configure(db_path=db_path)
+    loads = []
+    real_get_players = database.get_players_by_team_id
+    monkeypatch.setattr(
+        "database.get_players_by_team_id",
+        lambda team_id: loads.append(team_id) or real_get_players(team_id))
+
+    first = database.cached_players_by_team_id(1)
+    assert database.cached_players_by_team_id(1) is first
+    assert database.cached_all_teams() is database.cached_all_teams()
+    assert loads == [1]
+
+    # a write changes the file, so the next read reloads
+    conn.execute("INSERT INTO players (team_id, name) VALUES (1, 'New')")
+    conn.commit()
+    os.utime(db_path, ns=(0, 0))
+    assert len(database.cached_players_by_team_id(1)) == 4
+    assert loads == [1, 1]
+    conn.close()
+
+
+def test_fetch_functions_match_dataframes(tmp_path):
+    db_path = tmp_path / "mlb.db"
+    conn = create_db(db_path)
+    bulk_load(conn, *make_league(2, 3))
+    conn.close()
+    connections.configure(db_path=db_path)
+
+    teams = fetch_all_teams()
+    assert [t["name"] for t in teams] == ["Team 0", "Team 1"]
+    team = fetch_team(2)
+    assert dict(team) == get_team_by_id(2).to_dict()
+    assert fetch_team(99) is None
+    assert fetch_team_name(1) == "Team 0"
+    assert fetch_team_name(99) == "Unknown"
+
+    players = fetch_players(1)
+    expected = get_players_by_team_id(1).to_dict("records")
+    assert [dict(p) for p in players] == expected
+    assert fetch_players(99) == []
+
+
+def test_fetch_players_by_name_ignores_case(tmp_path):
+    db_path = tmp_path / "mlb.db"
+    conn = create_db(db_path)
+    bulk_load(conn, *make_league(2, 1))
+    conn.close()
+    connections.configure(db_path=db_path)
+
+    assert [tuple(row) for row in database.fetch_players_by_name("p0")] == [
+        ("P0", "7", "Team 0"), ("P0", "7", "Team 1")]
+    assert database.fetch_players_by_name("P1") == []
+
+
+def test_migrate_db_adds_integer_jersey_and_indexes(in_memory_db):
+    in_memory_db.executemany(
+        "INSERT INTO players (team_id, name, jersey_number) VALUES (1, ?, ?)",
+        [("A", "7"), ("B", "07"), ("C", ""), ("D", None), ("E", "4a")]
+    )
+    # running it twice must be harmless
+    database.migrate_db(in_memory_db)
+    database.migrate_db(in_memory_db)
+
+    cur = in_memory_db.cursor()
+    cur.execute("SELECT name, jersey_num FROM players ORDER BY name")
+    assert cur.fetchall() == [
+        ("A", 7), ("B", 7), ("C", None), ("D", None), ("E", None)
+    ]
+    cur.execute("EXPLAIN QUERY PLAN SELECT name FROM players "
+                "WHERE jersey_num = 7")
+    assert "idx_players_jersey" in cur.fetchall()[0][3]
+    cur.execute("EXPLAIN QUERY PLAN SELECT name FROM players "
+                "WHERE team_id = 1")
+    assert "idx_players_team" in cur.fetchall()[0][3]
+
+    # new rows get the integer value too
+    cur.execute("INSERT INTO players (team_id, name, jersey_number) "
+                "VALUES (1, 'F', '99')")
+    cur.execute("SELECT jersey_num FROM players WHERE name = 'F'")
+    assert cur.fetchone() == (99,)
+
+
+def test_ensure_schema_migrates_an_old_file_once(tmp_path, monkeypatch):
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT, "
+                 "team_ext TEXT UNIQUE)")
+    conn.execute("CREATE TABLE players (id INTEGER PRIMARY KEY, "
+                 "team_id INTEGER, name TEXT, jersey_number TEXT, "
+                 "headshot_url TEXT)")
+    conn.execute("INSERT INTO players (team_id, name, jersey_number) "
+                 "VALUES (1, 'A', '7')")
+    conn.commit()
+    conn.close()
+    connections.configure(db_path=db_path)
+    monkeypatch.setattr(database, "_schema_checked", set())
+
+    database.ensure_schema()
+    assert connections.get_read_connection().execute(
+        "SELECT jersey_num FROM players").fetchall() == [(7,)]
+
+    with patch("database.create_tables") as create_tables:
+        database.ensure_schema()
+    create_tables.assert_not_called()
@@ -0,0 +1,163 @@
+import os
+from unittest.mock import patch, Mock
+import pytest
+import requests
+from http_cache import ResponseCache
+from scraper import scrape_players
+
+URL = "https://www.mlb.com/team1/roster"
+
+
+def make_response(status_code=200, content=b"<html></html>", headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.content = content
+    response.headers = headers or {}
+    return response
+
+
+@patch('http_client.get')
+def test_first_fetch_is_changed(mock_get, tmp_path):
+    mock_get.return_value = make_response(headers={"ETag": '"abc"'})
+    cache = ResponseCache(tmp_path)
+
+    content, changed = cache.fetch(URL)
+
+    assert content == b"<html></html>"
+    assert changed is True
+    mock_get.assert_called_once_with(URL, headers={})
+
+
+@patch('http_client.get')
+def test_sends_validators_and_handles_304(mock_get, tmp_path):
+    mock_get.return_value = make_response(headers={
+        "ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"
+    })
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.save(URL)
+
+    mock_get.return_value = make_response(status_code=304, content=b"")
+    content, changed = cache.fetch(URL)
+
+    assert content == b"<html></html>"
+    assert changed is False
+    assert mock_get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"
+    }
+
+
+@patch('http_client.get')
+def test_same_body_counts_as_unchanged(mock_get, tmp_path):
+    mock_get.return_value = make_response()
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.save()
+
+    # a new cache object reads the index back from disk
+    _, changed = ResponseCache(tmp_path).fetch(URL)
+    assert changed is False
+
+    mock_get.return_value = make_response(content=b"<html>new</html>")
+    _, changed = ResponseCache(tmp_path).fetch(URL)
+    assert changed is True
+
+
+@patch('http_client.get')
+def test_clear_forgets_pages(mock_get, tmp_path):
+    mock_get.return_value = make_response()
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.clear()
+
+    _, changed = cache.fetch(URL)
+    assert changed is True
+
+
+@patch('http_client.get')
+def test_scrape_players_skips_unchanged_roster(mock_get, tmp_path):
+    mock_get.return_value = make_response()
+    cache = ResponseCache(tmp_path)
+
+    assert scrape_players("team1", cache=cache) == []
+    # not skipped until the caller has stored the roster
+    assert scrape_players("team1", cache=cache) == []
+    cache.save()
+    assert scrape_players("team1", cache=cache) is None
+
+
+@patch('http_client.get')
+def test_error_response_is_not_cached(mock_get, tmp_path):
+    mock_get.return_value = make_response()
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.save(URL)
+
+    mock_get.return_value = make_response(status_code=503,
+                                          content=b"<html>down</html>")
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(URL)
+
+    # the page from before the error is still the cached one
+    mock_get.return_value = make_response(status_code=304, content=b"")
+    assert cache.fetch(URL) == (b"<html></html>", False)
+
+
+@patch('http_client.get')
+def test_failed_index_write_keeps_previous_page(mock_get, tmp_path):
+    mock_get.return_value = make_response(headers={"ETag": '"old"'})
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.save()
+
+    mock_get.return_value = make_response(content=b"<html>new</html>",
+                                          headers={"ETag": '"new"'})
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    with patch.object(cache, "_save_index", side_effect=OSError("disk")):
+        with pytest.raises(OSError):
+            cache.save(URL)
+    assert URL in cache.pending
+
+    # the index on disk still matches the body it points at
+    mock_get.return_value = make_response(status_code=304, content=b"")
+    cache = ResponseCache(tmp_path)
+    assert cache.fetch(URL) == (b"<html></html>", False)
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"old"'}
+
+
+@patch('http_client.get')
+def test_changed_page_is_pending_until_saved(mock_get, tmp_path):
+    mock_get.return_value = make_response(headers={"ETag": '"old"'})
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.save(URL)
+
+    # fetched, but what was parsed from it was never stored
+    mock_get.return_value = make_response(content=b"<html>new</html>",
+                                          headers={"ETag": '"new"'})
+    assert cache.fetch(URL) == (b"<html>new</html>", True)
+    cache.discard()
+
+    cache = ResponseCache(tmp_path)
+    assert cache.fetch(URL) == (b"<html>new</html>", True)
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"old"'}
+    cache.save(URL)
+    assert ResponseCache(tmp_path).index[URL]["etag"] == '"new"'
+    # only the saved page's body is left
+    assert len([name for name in os.listdir(tmp_path)
+                if name.endswith(".html")]) == 1
+
+
+@patch('http_client.get')
+def test_refresh_counts_every_page_as_changed(mock_get, tmp_path):
+    mock_get.return_value = make_response(headers={"ETag": '"abc"'})
+    cache = ResponseCache(tmp_path)
+    cache.fetch(URL)
+    cache.save(URL)
+
+    cache = ResponseCache(tmp_path, refresh=True)
+    assert cache.fetch(URL) == (b"<html></html>", True)
+    assert mock_get.call_args.kwargs["headers"] == {}
@@ -0,0 +1,106 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import http_client
+from api import get_player_info
+from scraper import scrape_players
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves canned responses; keeps connections alive like a real host."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.client_ports.add(self.client_address[1])
+        status, body, delay = server.responses.pop(0) \
+            if server.responses else (200, b"{}", 0)
+        time.sleep(delay)
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.requests = []
+    server.client_ports = set()
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+    http_client.configure(connect_timeout=http_client.CONNECT_TIMEOUT,
+                          read_timeout=http_client.READ_TIMEOUT,
+                          retries=http_client.RETRIES)
+
+
+def test_session_is_shared():
+    assert http_client.get_session() is http_client.get_session()
+
+
+def test_connections_are_reused(stand_in):
+    for _ in range(3):
+        assert http_client.get(stand_in.url + "/ping").status_code == 200
+    assert len(stand_in.requests) == 3
+    assert len(stand_in.client_ports) == 1
+
+
+def test_retries_server_errors(stand_in):
+    stand_in.responses = [(503, b"", 0), (429, b"", 0), (200, b"ok", 0)]
+    response = http_client.get(stand_in.url + "/flaky")
+    assert response.status_code == 200
+    assert response.content == b"ok"
+    assert len(stand_in.requests) == 3
+
+
+def test_gives_back_last_response_when_retries_run_out(stand_in):
+    stand_in.responses = [(500, b"", 0)] * 4
+    response = http_client.get(stand_in.url + "/down")
+    assert response.status_code == 500
+    assert len(stand_in.requests) == 4
+
+
+def test_read_timeout(stand_in):
+    http_client.configure(read_timeout=0.05, retries=0)
+    stand_in.responses = [(200, b"late", 0.3)]
+    start = time.monotonic()
+    # api.py treats any RequestException as "no data"
+    with pytest.raises(requests.exceptions.RequestException):
+        http_client.get(stand_in.url + "/slow")
+    assert time.monotonic() - start < 0.3
+
+
+def test_configure_rejects_unknown_settings():
+    with pytest.raises(TypeError):
+        http_client.configure(proxy="nope")
+
+
+def test_api_uses_shared_client(stand_in, monkeypatch):
+    monkeypatch.setattr("api.API_URL", stand_in.url)
+    stand_in.responses = [(200, b'{"player": [{"idPlayer": "1", '
+                                b'"strSport": "Baseball"}]}', 0)]
+    assert get_player_info("Jane Doe")["idPlayer"] == "1"
+    assert stand_in.requests == ["/searchplayers.php?p=Jane_Doe"]
+
+
+def test_scraper_uses_shared_client(stand_in, monkeypatch):
+    monkeypatch.setattr("scraper.ROSTER_URL",
+                        stand_in.url + "/{team_ext}/roster")
+    stand_in.responses = [(200, b"<table><tr><td class='info'><a>Jane Doe"
+                                b"</a></td></tr></table>", 0)]
+    players = scrape_players("yankees")
+    assert [p['player_name'] for p in players] == ["Jane Doe"]
+    assert stand_in.requests == ["/yankees/roster"]
@@ -0,0 +1,60 @@
+import pytest
+from intent_router import route, find_team, build_aliases
+
+
+def test_aliases_skip_ambiguous_names(league):
+    aliases = build_aliases()
+    assert aliases["yankees"] == 1
+    assert aliases["red sox"] == 2
+    assert aliases["redsox"] == 2
+    assert "sox" not in aliases
+    assert find_team("Where do the White Sox play?") == 3
+    assert find_team("How many strikes for an out?") is None
+
+
+@pytest.mark.parametrize("question,answer", [
+    ("Who wears #99 for the Yankees?",
+     "#99 for the New York Yankees: Aaron Judge."),
+    ("who is number 7 on the yankees",
+     "Nobody on the New York Yankees roster wears #7."),
+    ("Who wears number 11?",
+     "Players wearing #11: Rafael Devers (Boston Red Sox) and "
+     "Anthony Volpe (New York Yankees)."),
+    ("What stadium do the Red Sox play in?",
+     "The Boston Red Sox play at Fenway Park, 4 Jersey Street Boston."),
+    ("What's the phone number for the redsox?",
+     "You can reach the Boston Red Sox at (877) 733-7699."),
+    ("Who plays for the Red Sox?",
+     "The Boston Red Sox roster: Rafael Devers (#11) and Trevor Story."),
+    ("What team does aaron judge play for?",
+     "Aaron Judge plays for the New York Yankees."),
+    ("What number does Trevor Story wear?",
+     "Trevor Story of the Boston Red Sox has no number listed."),
+    ("What number is Rafael Devers's jersey?",
+     "Rafael Devers wears #11 for the Boston Red Sox."),
+    ("Where do the Yankees play?",
+     "The New York Yankees play at Yankee Stadium, 1 E 161st St Bronx."),
+    ("What is the Red Sox's roster?",
+     "The Boston Red Sox roster: Rafael Devers (#11) and Trevor Story."),
+])
+def test_route_answers_roster_questions(league, question, answer):
+    assert route(question) == answer
+
+
+@pytest.mark.parametrize("question", [
+    "How many strikes for an out?",
+    "What team won the 2020 World Series?",
+    "Who is the #1 prospect for the Yankees?",
+    "Tell me about the White Sox",
+    "What's the phone number for the White Sox?",
+    # the right words, but more than a roster lookup is being asked
+    "Why is jersey number 42 retired?",
+    "What stadium did the Yankees play in before 2009?",
+    "Who is the best player on the Yankees roster?",
+    "Is Aaron Judge the best player on the Yankees roster?",
+    "Who plays for the Yankees at first base?",
+    "Who wears #99 for the Yankees and why?",
+    "What number does Aaron Judge wear in spring training?",
+])
+def test_route_leaves_open_questions_to_the_model(league, question):
+    assert route(question) is None
@@ -1,7 +1,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
-import pandas as pd
-from ai import get_teams_and_players, ai_bot
+import ai
+import connections
+from ai import ai_bot
+from chat_history import ChatHistory
+from database import create_db
 import streamlit as st
 from types import SimpleNamespace
 
@@ -11,36 +14,6 @@ def reset_streamlit_session():
     st.session_state.clear()
 
 
-# Mocking sqlite3 to avoid using an actual database
-@pytest.fixture
-def mock_sqlite3():
-    with patch("sqlite3.connect") as mock_connect:
-        mock_conn = MagicMock()
-        mock_connect.return_value = mock_conn
-        yield mock_conn
-
-
-# Test get_teams_and_players function
-def test_get_teams_and_players(mock_sqlite3):
-    # Prepare mock return value for the SQL query
-    mock_df = pd.DataFrame({
-        'team_name': ['Team A', 'Team B', 'Team A'],
-        'player_name': ['Player 1', 'Player 2', 'Player 3']
-    })
-    # Mock the behavior of pd.read_sql_query
-    with patch("pandas.read_sql_query", return_value=mock_df):
-        teams_and_players = get_teams_and_players()
-        expected_output = (
-            "Team: Team A, Player: Player 1\n"
-            "Team: Team B, Player: Player 2\n"
-            "Team: Team A, Player: Player 3"
-        )
-
-        actual_output = ''.join(sorted(teams_and_players.splitlines()))
-        expected_output = ''.join(sorted(expected_output.splitlines()))
-        assert actual_output == expected_output
-
-
 @patch("streamlit.chat_input")
 @patch("streamlit.chat_message")
 @patch("openai.AzureOpenAI")
@@ -85,3 +58,149 @@ def test_ai_bot(mock_azure_openai_class, mock_chat_message, mock_chat_input):
             "role": "assistant",
             "content": "Sure, I can help with that!"
         }
+
+
+def test_ai_bot_offers_tools_instead_of_the_roster(tmp_path):
+    db_path = tmp_path / "mlb.db"
+    conn = create_db(db_path)
+    conn.execute("INSERT INTO teams (name) VALUES ('Team A')")
+    conn.execute("INSERT INTO players (team_id, name) "
+                 "VALUES (1, 'Player One')")
+    conn.commit()
+    conn.close()
+    connections.configure(db_path=db_path)
+
+    client = MagicMock()
+    client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="Ok"))])
+    with patch("streamlit.chat_input", return_value="Who is Player One?"), \
+            patch("streamlit.chat_message"):
+        ai_bot(client=client)
+
+    kwargs = client.chat.completions.create.call_args.kwargs
+    assert kwargs["messages"][0]["content"] == ai.SYSTEM_PROMPT
+    assert "Player One" not in kwargs["messages"][0]["content"]
+    assert [tool["function"]["name"] for tool in kwargs["tools"]] == [
+        "lookup_team", "list_roster", "find_player_by_jersey", "get_stadium"]
+
+
+def chunk(text):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def test_ai_bot_streams_reply():
+    client = MagicMock()
+    client.chat.completions.create.return_value = iter([
+        SimpleNamespace(choices=[]), chunk("Play "), chunk(None),
+        chunk("ball!")])
+    shown = []
+
+    def write_stream(stream):
+        for text in stream:
+            shown.append(text)
+            # nothing is stored until the reply is complete
+            assert len(st.session_state.messages) == 2
+        return "".join(shown)
+
+    with patch("streamlit.chat_input", return_value="Hi Ump"), \
+            patch("streamlit.chat_message"), \
+            patch("streamlit.write_stream", side_effect=write_stream):
+        ai_bot(client=client, stream=True)
+
+    assert shown == ["🧑‍⚖️ Ump: ", "Play ", "ball!"]
+    assert client.chat.completions.create.call_args.kwargs["stream"]
+    assert st.session_state.messages[-1] == {"role": "assistant",
+                                             "content": "Play ball!"}
+
+
+def ask(client, question, stream=False):
+    with patch("streamlit.chat_input", return_value=question), \
+            patch("streamlit.chat_message"), \
+            patch("streamlit.write_stream",
+                  side_effect=lambda stream: "".join(stream)):
+        ai_bot(client=client, stream=stream)
+    return st.session_state.messages[-1]["content"]
+
+
+def test_ai_bot_answers_repeat_questions_from_cache():
+    client = MagicMock()
+    client.chat.completions.create.return_value = iter([chunk("Three.")])
+
+    assert ask(client, "How many strikes for an out?", stream=True) == \
+        "Three."
+    # a new chat, same words with different case and punctuation
+    st.session_state.clear()
+    assert ask(client, "how many strikes for an out") == "Three."
+    assert client.chat.completions.create.call_count == 1
+
+
+@patch("ai.route", return_value=None)
+def test_follow_ups_are_not_shared_between_chats(mock_route):
+    client = MagicMock()
+    replies = iter(["Fenway Park.", "Connor Wong.", "Yankee Stadium.",
+                    "Austin Wells."])
+    client.chat.completions.create.side_effect = lambda **kwargs: \
+        SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content=next(replies)))])
+
+    ask(client, "Where do the Red Sox play?")
+    assert ask(client, "Who is their catcher?") == "Connor Wong."
+
+    st.session_state.clear()
+    ask(client, "Where do the Yankees play?")
+    assert ask(client, "Who is their catcher?") == "Austin Wells."
+    assert client.chat.completions.create.call_count == 4
+
+
+def test_answer_key_depends_on_data_model_and_conversation():
+    # data is the database's file stamp in the app
+    key = ai.answer_key("Who catches for the Yankees?", "stamp 1", "gpt")
+    assert key == ai.answer_key("who catches for the yankees", "stamp 1",
+                                "gpt")
+    assert key != ai.answer_key("Who catches for the Yankees?", "stamp 2",
+                                "gpt")
+    assert key != ai.answer_key("Who catches for the Yankees?", "stamp 1",
+                                "gpt-4")
+    assert key != ai.answer_key("Who catches for the Yankees?", "stamp 1",
+                                "gpt", [{"role": "user", "content": "Hi"}])
+
+
+def test_build_prompt():
+    chat = [{"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello"},
+            {"role": "user", "content": "Who catches for the Yankees?"}]
+
+    messages, key = ai.build_prompt(ChatHistory(), chat, "gpt")
+
+    assert messages == [{"role": "system", "content": ai.SYSTEM_PROMPT}] + chat
+    assert key == ai.answer_key("Who catches for the Yankees?",
+                                repr(connections.file_stamp()), "gpt",
+                                messages[:-1])
+
+
+def test_ai_bot_sends_recent_turns_and_summary():
+    client = MagicMock()
+    client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="Ok"))])
+    st.session_state["history"] = ChatHistory(keep_turns=2)
+    st.session_state["messages"] = [
+        {"role": role, "content": f"{role} {i}"}
+        for i in range(50) for role in ("user", "assistant")
+    ]
+
+    ask(client, "Last question")
+
+    messages = client.chat.completions.create.call_args.kwargs["messages"]
+    # system prompt, summary, two turns and the question
+    assert len(messages) == 7
+    assert messages[1]["content"].startswith("Earlier in this chat:")
+    assert messages[-1]["content"] == "Last question"
+
+
+def test_ai_bot_answers_roster_questions_without_model():
+    client = MagicMock()
+    with patch("ai.route", return_value="#99 for the Yankees: Aaron Judge."):
+        assert ask(client, "Who wears #99 for the Yankees?") == \
+            "#99 for the Yankees: Aaron Judge."
+    client.chat.completions.create.assert_not_called()
@@ -1,10 +1,11 @@
 from unittest.mock import patch, MagicMock
+import pytest
 import requests
 from api import get_player_info, get_player_teams, get_player_honors
 
 
 # Test for get_player_info
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_info_success(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -27,7 +28,7 @@ def test_get_player_info_success(mock_get):
     assert player_info["strPosition"] == "Pitcher"
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_info_no_player_found(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -38,7 +39,7 @@ def test_get_player_info_no_player_found(mock_get):
     assert player_info is None
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_info_not_baseball(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -57,7 +58,7 @@ def test_get_player_info_not_baseball(mock_get):
     assert player_info is None
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_teams_success(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -82,7 +83,7 @@ def test_get_player_teams_success(mock_get):
     assert player_teams[0]["departed"] == "2017-01-01"
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_teams_no_teams(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -93,7 +94,7 @@ def test_get_player_teams_no_teams(mock_get):
     assert player_teams == []
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_honors_success(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -116,7 +117,7 @@ def test_get_player_honors_success(mock_get):
     assert player_honors[0]["year"] == "2016"
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_honors_no_honors(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
@@ -127,22 +128,31 @@ def test_get_player_honors_no_honors(mock_get):
     assert player_honors == []
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_info_request_exception(mock_get):
     mock_get.side_effect = requests.exceptions.RequestException
     player_info = get_player_info("John Doe")
     assert player_info is None
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_teams_request_exception(mock_get):
     mock_get.side_effect = requests.exceptions.RequestException
     player_teams = get_player_teams("12345")
     assert player_teams == []
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_get_player_honors_request_exception(mock_get):
     mock_get.side_effect = requests.exceptions.RequestException
     player_honors = get_player_honors("12345")
     assert player_honors == []
+
+
+@patch('http_client.get')
+def test_request_errors_can_be_raised(mock_get):
+    mock_get.side_effect = requests.exceptions.Timeout
+    with pytest.raises(requests.exceptions.Timeout):
+        get_player_info("John Doe", raise_errors=True)
+    with pytest.raises(requests.exceptions.Timeout):
+        get_player_honors("12345", raise_errors=True)
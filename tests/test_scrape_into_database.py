@@ -1,32 +1,409 @@
+import os
+import sqlite3
+import pytest
 from unittest import mock
-from scrape_into_database import main
+import requests
+import connections
+from scraper import scrape_players
+from database import create_db, get_player_profile
+from http_client import RateLimiter
+import scrape_into_database
+from database import save_player_profile, save_trivia_bank
+from scrape_into_database import (main, parse_args, enrich_players,
+                                  validate_db, build_and_swap,
+                                  copy_profiles, copy_trivia_bank)
 
 
+@mock.patch("scrape_into_database.checkpoint")
+@mock.patch("scrape_into_database.enable_wal")
+@mock.patch("scrape_into_database.enrich_players")
 @mock.patch("scrape_into_database.geocode_and_update_teams")
 @mock.patch("scrape_into_database.add_lat_lng_columns")
 @mock.patch("scrape_into_database.insert_teams_and_players")
-@mock.patch("scrape_into_database.create_db")
+@mock.patch("scrape_into_database.create_tables")
+@mock.patch("scrape_into_database.writer")
 @mock.patch("scrape_into_database.scrape_teams")
 def test_main(
     mock_scrape_teams,
-    mock_create_db,
+    mock_writer,
+    mock_create_tables,
     mock_insert_teams_and_players,
     mock_add_lat_lng_columns,
     mock_geocode_and_update_teams,
+    mock_enrich_players,
+    mock_enable_wal,
+    mock_checkpoint,
 ):
     # Arrange
     fake_conn = mock.Mock()
-    mock_create_db.return_value = fake_conn
+    mock_writer.return_value.__enter__ = mock.Mock(return_value=fake_conn)
+    mock_writer.return_value.__exit__ = mock.Mock(return_value=False)
     mock_scrape_teams.return_value = [{"name": "Yankees"}]
 
     # Act
     main()
 
     # Assert
-    mock_scrape_teams.assert_called_once_with("https://www.mlb.com/team")
-    mock_create_db.assert_called_once()
+    mock_scrape_teams.assert_called_once_with("https://www.mlb.com/team",
+                                              cache=None)
+    # everything is written through the one serialized writer
+    mock_writer.assert_called_once_with(None)
+    mock_create_tables.assert_called_once_with(fake_conn)
     mock_insert_teams_and_players.assert_called_once_with(
-        fake_conn, [{"name": "Yankees"}])
-    mock_add_lat_lng_columns.assert_called_once()
-    mock_geocode_and_update_teams.assert_called_once()
-    fake_conn.close.assert_called_once()
+        fake_conn, [{"name": "Yankees"}], player_scraper=scrape_players,
+        max_workers=8, per_host=4, sync=True, on_synced=None)
+    mock_add_lat_lng_columns.assert_called_once_with(None)
+    mock_geocode_and_update_teams.assert_called_once_with(None)
+    mock_enrich_players.assert_called_once_with(
+        fake_conn, max_workers=8, rate=5.0, refresh=False)
+    mock_enable_wal.assert_called_once_with(fake_conn)
+    mock_checkpoint.assert_called_once_with(fake_conn)
+    mock_writer.return_value.__exit__.assert_called_once()
+
+
+def test_parse_args():
+    args = parse_args(["--workers", "16", "--per-host", "2",
+                       "--cache-dir", "cache"])
+    assert args.workers == 16
+    assert args.per_host == 2
+    assert args.cache_dir == "cache"
+
+
+@mock.patch("scrape_into_database.get_player_honors")
+@mock.patch("scrape_into_database.get_player_teams")
+@mock.patch("scrape_into_database.get_player_info")
+def test_enrich_players(mock_info, mock_teams, mock_honors, tmp_path):
+    conn = create_db(tmp_path / "mlb.db")
+    conn.execute("INSERT INTO teams (name, team_ext) VALUES ('A', '/a')")
+    conn.executemany(
+        "INSERT INTO players (team_id, name) VALUES (1, ?)",
+        [("Known Player",), ("Unknown Player",)]
+    )
+    conn.commit()
+    mock_info.side_effect = lambda name, **kwargs: (
+        {"idPlayer": "7", "strNationality": "Japan", "dateBorn": "1994-07-05",
+         "strPosition": "Pitcher"} if name == "Known Player" else None
+    )
+    mock_teams.return_value = [{"former_team": "Fighters", "move_type": "",
+                                "joined": "2013", "departed": "2017"}]
+    mock_honors.return_value = [{"honour": "MVP", "team_name": "Angels",
+                                 "year": "2021"}]
+
+    assert enrich_players(conn, max_workers=2, rate=1000) == 2
+    # everything is stored, so a second pass has nothing to fetch
+    assert enrich_players(conn, max_workers=2, rate=1000) == 0
+
+    known = get_player_profile(1, conn=conn)
+    assert known["info"]["strNationality"] == "Japan"
+    assert known["former_teams"][0]["former_team"] == "Fighters"
+    assert known["honors"][0]["honour"] == "MVP"
+    assert get_player_profile(2, conn=conn) == {
+        "info": None, "former_teams": [], "honors": []
+    }
+    mock_teams.assert_called_once_with("7", raise_errors=True,
+                                       refresh=False)
+    conn.close()
+
+
+@mock.patch("scrape_into_database.get_player_honors", return_value=[])
+@mock.patch("scrape_into_database.get_player_teams")
+@mock.patch("scrape_into_database.get_player_info")
+def test_enrich_players_retries_failed_calls(mock_info, mock_teams,
+                                             mock_honors, tmp_path):
+    conn = create_db(tmp_path / "mlb.db")
+    conn.execute("INSERT INTO teams (name, team_ext) VALUES ('A', '/a')")
+    conn.executemany("INSERT INTO players (team_id, name) VALUES (1, ?)",
+                     [("Timed Out",), ("Throttled",)])
+    conn.commit()
+    mock_info.side_effect = [requests.Timeout("slow"),
+                             {"idPlayer": "8"}]
+    mock_teams.side_effect = requests.HTTPError("429")
+
+    # neither failure is stored as an empty profile
+    assert enrich_players(conn, max_workers=1, rate=1000) == 0
+    assert get_player_profile(1, conn=conn) is None
+    assert get_player_profile(2, conn=conn) is None
+    assert mock_info.call_args.kwargs == {"raise_errors": True,
+                                          "refresh": False}
+
+    # the next run asks again
+    mock_info.side_effect = None
+    mock_info.return_value = None
+    assert enrich_players(conn, max_workers=1, rate=1000) == 2
+    conn.close()
+
+
+def test_refresh_profiles_calls_the_api_again(tmp_path, mocker):
+    conn = create_db(tmp_path / "mlb.db")
+    conn.execute("INSERT INTO teams (name, team_ext) VALUES ('A', '/a')")
+    conn.execute("INSERT INTO players (team_id, name) VALUES (1, 'Ace')")
+    conn.commit()
+    answers = {"searchplayers": {"player": [{"idPlayer": "7",
+                                             "strSport": "Baseball"}]},
+               "lookupformerteams": {"formerteams": None},
+               "lookuphonours": {"honours": None}}
+    get = mocker.patch("http_client.get", side_effect=lambda url: mock.Mock(
+        json=mock.Mock(return_value=answers[url.split("/")[-1]
+                                            .split(".")[0]])))
+
+    assert enrich_players(conn, max_workers=1, rate=1000) == 1
+    assert get.call_count == 3
+
+    # the API's answers are still cached, a refresh asks it again
+    answers["searchplayers"]["player"][0]["strNationality"] = "Japan"
+    assert enrich_players(conn, max_workers=1, rate=1000,
+                          refresh=True) == 1
+    assert get.call_count == 6
+    assert get_player_profile(1, conn=conn)["info"]["strNationality"] == (
+        "Japan")
+    conn.close()
+
+
+def test_rate_limiter_spaces_calls():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [0.25, 0.25]
+
+
+def write_league(path, teams=2, placed=True):
+    conn = create_db(path)
+    for i in range(1, teams + 1):
+        conn.execute("INSERT INTO teams (name, team_ext) VALUES (?, ?)",
+                     (f"Team {i}", f"/t{i}"))
+        conn.execute("INSERT INTO players (team_id, name) VALUES (?, ?)",
+                     (i, f"Player {i}"))
+    conn.execute("ALTER TABLE teams ADD COLUMN latitude REAL")
+    conn.execute("ALTER TABLE teams ADD COLUMN longitude REAL")
+    if placed:
+        conn.execute("UPDATE teams SET latitude = 40.0, longitude = -74.0")
+    conn.commit()
+    conn.close()
+
+
+def test_validate_db(tmp_path):
+    good = tmp_path / "good.db"
+    write_league(good)
+    validate_db(str(good), min_teams=2)
+
+    bad = tmp_path / "bad.db"
+    write_league(bad, placed=False)
+    with pytest.raises(ValueError) as e:
+        validate_db(str(bad), min_teams=3)
+    assert "only 2 teams" in str(e.value)
+    assert "without coordinates: Team 1, Team 2" in str(e.value)
+
+
+def test_build_and_swap_replaces_live_db(tmp_path):
+    live = tmp_path / "mlb.db"
+    write_league(live, teams=1)
+    connections.configure(db_path=live)
+    old = connections.get_read_connection()
+    assert old.execute("SELECT COUNT(*) FROM teams").fetchone() == (1,)
+
+    def fake_main(db_path, previous_db, **options):
+        assert previous_db == str(live)
+        assert options == {"enrich": False, "save_cache": False}
+        write_league(db_path, teams=3)
+
+    with mock.patch("scrape_into_database.main", side_effect=fake_main):
+        build_and_swap(str(live), min_teams=3, enrich=False)
+
+    # readers move to the new file, and the temp file is gone
+    conn = connections.get_read_connection()
+    assert conn is not old
+    assert conn.execute("SELECT COUNT(*) FROM teams").fetchone() == (3,)
+    assert not [name for name in os.listdir(tmp_path)
+                if name.startswith(".build-")]
+
+
+def test_build_and_swap_keeps_live_db_when_invalid(tmp_path):
+    live = tmp_path / "mlb.db"
+    write_league(live, teams=1)
+    before = live.read_bytes()
+
+    def fake_main(db_path, previous_db, **options):
+        write_league(db_path, teams=3, placed=False)
+
+    with mock.patch("scrape_into_database.main", side_effect=fake_main):
+        with pytest.raises(ValueError):
+            build_and_swap(str(live), min_teams=3)
+
+    assert live.read_bytes() == before
+    assert os.listdir(tmp_path) == ["mlb.db"]
+
+
+def test_build_and_swap_keeps_wal_mode(tmp_path):
+    live = tmp_path / "mlb.db"
+    write_league(live, teams=1)
+
+    def fake_main(db_path, previous_db, **options):
+        write_league(db_path, teams=3)
+
+    with mock.patch("scrape_into_database.main", side_effect=fake_main):
+        build_and_swap(str(live), min_teams=3)
+
+    conn = connections.connect(live)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    conn.close()
+
+
+def test_build_and_swap_gives_up_while_live_is_busy(tmp_path, monkeypatch):
+    live = tmp_path / "mlb.db"
+    write_league(live, teams=1)
+    before = live.read_bytes()
+    monkeypatch.setattr(scrape_into_database, "SWAP_RETRY_DELAY", 0)
+    checkpoints = []
+
+    def checkpoint(conn):
+        checkpoints.append(conn)
+        # the build folds in fine, the live db always has a reader
+        return (0, 0, 0) if len(checkpoints) == 1 else (1, 5, 3)
+
+    def fake_main(db_path, previous_db, **options):
+        write_league(db_path, teams=3)
+
+    with mock.patch("scrape_into_database.main", side_effect=fake_main), \
+            mock.patch("scrape_into_database.checkpoint",
+                       side_effect=checkpoint):
+        with pytest.raises(RuntimeError, match="busy"):
+            build_and_swap(str(live), min_teams=3)
+
+    assert len(checkpoints) == 1 + scrape_into_database.SWAP_RETRIES + 1
+    assert live.read_bytes() == before
+    assert os.listdir(tmp_path) == ["mlb.db"]
+
+
+def test_profiles_and_trivia_bank_are_carried_over(tmp_path):
+    old = tmp_path / "old.db"
+    write_league(old, teams=2)
+    conn = create_db(old)
+    save_player_profile(conn, 2, {"idPlayer": "9", "strNationality": "Cuba",
+                                  "dateBorn": "1990-01-01",
+                                  "strPosition": "Catcher"},
+                        [{"former_team": "Reds", "move_type": "Trade",
+                          "joined": "2015", "departed": "2018"}],
+                        [{"honour": "All-Star", "team_name": "Reds",
+                          "year": "2017"}])
+    save_trivia_bank(conn, 2, [{"question": "Q", "correct_answer": "A",
+                                "choices": ["A", "B", "C", "D"],
+                                "image_url": None}])
+    conn.close()
+
+    # the new build scraped the teams in another order
+    conn = create_db(tmp_path / "new.db")
+    conn.executemany("INSERT INTO teams (name, team_ext) VALUES (?, ?)",
+                     [("Team 2", "/t2"), ("Team 1", "/t1")])
+    conn.executemany("INSERT INTO players (team_id, name) VALUES (?, ?)",
+                     [(1, "Newcomer"), (1, "Player 2"), (2, "Player 1")])
+    conn.commit()
+
+    copy_profiles(conn, old)
+    copy_trivia_bank(conn, old)
+
+    profile = get_player_profile(2, conn=conn)
+    assert profile["info"]["strNationality"] == "Cuba"
+    assert profile["former_teams"][0]["former_team"] == "Reds"
+    assert profile["honors"][0]["honour"] == "All-Star"
+    assert get_player_profile(1, conn=conn) is None
+    assert conn.execute("SELECT team_id, question FROM trivia_questions"
+                        ).fetchall() == [(1, "Q")]
+
+    # a database from before profiles existed has nothing to copy
+    bare = tmp_path / "bare.db"
+    bare_conn = sqlite3.connect(bare)
+    bare_conn.execute("CREATE TABLE teams (id INTEGER PRIMARY KEY)")
+    bare_conn.close()
+    copy_profiles(conn, bare)
+    copy_trivia_bank(conn, bare)
+    conn.close()
+
+
+"""The page cache only moves on once the rosters are stored"""
+
+
+TEAM_PAGE = """
+<div class="p-forge-list-item"><a href="/t{i}"></a>
+<h2 class="p-heading__text">Team {i}</h2>
+<div class="p-wysiwyg"><p>Park {i}<br/>{i} Main St<br/>Town<br/>Phone</p>
+</div></div>"""
+ROSTER_PAGE = """<table><tr><td class="info"><a>{name}</a>
+<span class="jersey">1</span></td></tr></table>"""
+
+
+@pytest.fixture
+def mlb_site(mocker):
+    """Stand-ins for mlb.com and the geocoder; pages["names"] is served."""
+    pages = {"names": ["Old"]}
+
+    def get(url, headers=None):
+        if url.endswith("/team"):
+            body = "".join(TEAM_PAGE.format(i=i) for i in (1, 2))
+        else:
+            body = "".join(ROSTER_PAGE.format(name=name)
+                           for name in pages["names"])
+        return mock.Mock(status_code=200, ok=True, content=body.encode(),
+                         headers={"ETag": str(hash(body))})
+
+    def geocode(address):
+        return mock.Mock(latitude=40.0, longitude=-74.0)
+
+    mocker.patch("http_client.get", side_effect=get)
+    mocker.patch("data_displays.Nominatim",
+                 return_value=mock.Mock(geocode=geocode))
+    mocker.patch("data_displays.sleep")
+    return pages
+
+
+def roster(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT DISTINCT name FROM players").fetchall()
+    finally:
+        conn.close()
+
+
+def test_refresh_after_failed_swap_fetches_rosters_again(tmp_path, mlb_site):
+    live = str(tmp_path / "mlb.db")
+    cache_dir = str(tmp_path / "cache")
+    options = dict(cache_dir=cache_dir, enrich=False, max_workers=1)
+    main(db_path=live, **options)
+    assert roster(live) == [("Old",)]
+
+    # the new rosters are fetched into a build that fails validation
+    mlb_site["names"] = ["New"]
+    with pytest.raises(ValueError):
+        build_and_swap(live, min_teams=3, **options)
+    assert roster(live) == [("Old",)]
+
+    main(db_path=live, **options)
+    assert roster(live) == [("New",)]
+
+    # once stored, the unchanged pages are skipped again
+    with mock.patch("database.sync_roster") as sync:
+        main(db_path=live, **options)
+    assert [call.args[2] for call in sync.call_args_list] == [None, None]
+
+
+def test_refresh_after_failed_load_fetches_rosters_again(tmp_path, mlb_site):
+    live = str(tmp_path / "mlb.db")
+    options = dict(cache_dir=str(tmp_path / "cache"), enrich=False,
+                   max_workers=1)
+    main(db_path=live, **options)
+
+    mlb_site["names"] = ["New"]
+    with mock.patch("database.sync_roster",
+                    side_effect=sqlite3.OperationalError("disk full")):
+        with pytest.raises(sqlite3.OperationalError):
+            main(db_path=live, **options)
+    assert roster(live) == [("Old",)]
+
+    main(db_path=live, **options)
+    assert roster(live) == [("New",)]
@@ -1,6 +1,9 @@
+import threading
+import time
 import pytest
 from unittest.mock import patch, Mock
-from scraper import scrape_teams, scrape_players
+import requests
+from scraper import scrape_teams, scrape_players, scrape_all_players
 
 # Clean and consistent mock HTML for testing
 MOCK_HTML_TEAMS = """
@@ -60,7 +63,7 @@ MOCK_HTML_PLAYERS = """
 """
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_scrape_teams(mock_get):
     mock_response = Mock()
     mock_response.content = MOCK_HTML_TEAMS
@@ -85,7 +88,7 @@ def test_scrape_teams(mock_get):
     assert result[1]['team_ext'] == '/team2'
 
 
-@patch('requests.get')
+@patch('http_client.get')
 def test_scrape_players(mock_get):
     mock_response = Mock()
     mock_response.content = MOCK_HTML_PLAYERS
@@ -104,5 +107,51 @@ def test_scrape_players(mock_get):
     assert result[1]['headshot_url'] == 'https://www.mlb.com/player2.jpg'
 
 
+def test_scrape_all_players_keeps_team_order():
+    def fake_scraper(team_ext):
+        time.sleep(0.01)
+        return [{'player_name': f"{team_ext} player"}]
+
+    result = scrape_all_players(["a", "b", "c"], player_scraper=fake_scraper)
+
+    assert list(result) == ["a", "b", "c"]
+    assert result["b"] == [{'player_name': "b player"}]
+
+
+def test_scrape_all_players_respects_per_host_limit():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_scraper(team_ext):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return []
+
+    scrape_all_players([f"team{i}" for i in range(10)],
+                       player_scraper=fake_scraper,
+                       max_workers=8, per_host=2)
+
+    assert peak <= 2
+
+
+@patch('http_client.get')
+def test_scrape_players_returns_none_on_error(mock_get):
+    mock_response = Mock()
+    mock_response.content = b"<html><table><tr></tr></table></html>"
+    mock_response.raise_for_status.side_effect = requests.HTTPError("503")
+    mock_get.return_value = mock_response
+
+    assert scrape_players("team1") is None
+
+    mock_get.side_effect = requests.ConnectionError("no route")
+    assert scrape_players("team1") is None
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+from unittest.mock import patch
+import connections
+import synthetic_league
+from database import fetch_players, get_player_profile
+from synthetic_league import generate_league, make_teams, parse_args
+
+
+def counts(path):
+    conn = sqlite3.connect(path)
+    result = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("teams", "players", "player_profiles")
+    }
+    result["unplaced"] = conn.execute(
+        "SELECT COUNT(*) FROM teams WHERE latitude IS NULL").fetchone()[0]
+    result["players"] = conn.execute(
+        "SELECT team_id, name, jersey_number FROM players ORDER BY id"
+    ).fetchall()
+    conn.close()
+    return result
+
+
+def test_generate_league(tmp_path):
+    path = tmp_path / "league.db"
+    # a small batch size exercises the batched profile pass
+    assert generate_league(path, n_teams=5, players_per_team=7,
+                           batch_size=4) == (5, 35)
+
+    stored = counts(path)
+    assert stored["teams"] == 5
+    assert len(stored["players"]) == 35
+    assert stored["player_profiles"] == 35
+    assert stored["unplaced"] == 0
+
+    # the app's own queries work on it
+    connections.configure(db_path=path)
+    assert len(fetch_players(5)) == 7
+    profile = get_player_profile(35)
+    assert profile["info"]["idPlayer"] == "1000035"
+
+
+def test_generate_league_is_repeatable(tmp_path):
+    generate_league(tmp_path / "a.db", n_teams=3, players_per_team=4,
+                    profiles=False)
+    generate_league(tmp_path / "b.db", n_teams=3, players_per_team=4,
+                    profiles=False)
+    generate_league(tmp_path / "c.db", n_teams=3, players_per_team=4,
+                    seed=1, profiles=False)
+
+    a, b, c = (counts(tmp_path / name) for name in ("a.db", "b.db", "c.db"))
+    assert a == b
+    assert a["players"] != c["players"]
+    assert a["player_profiles"] == 0
+
+
+def test_generate_league_is_one_writer(tmp_path):
+    # another thread trying to write while the league is loading
+    blocked = []
+
+    def try_to_write(*args, **kwargs):
+        def attempt():
+            got = connections._writer_lock.acquire(blocking=False)
+            if got:
+                connections._writer_lock.release()
+            blocked.append(not got)
+        thread = threading.Thread(target=attempt)
+        thread.start()
+        thread.join()
+
+    with patch.object(synthetic_league, "add_profiles",
+                      side_effect=try_to_write):
+        generate_league(tmp_path / "league.db", n_teams=2,
+                        players_per_team=2)
+    assert blocked == [True]
+
+
+def test_make_teams_unique():
+    teams = make_teams(500)
+    assert len({team["team_ext"] for team in teams}) == 500
+    assert len({team["team_name"] for team in teams}) == 500
+
+
+def test_parse_args():
+    args = parse_args(["big.db", "--teams", "3000", "--players", "400",
+                       "--no-profiles"])
+    assert args.db_path == "big.db"
+    assert (args.teams, args.players, args.profiles) == (3000, 400, False)
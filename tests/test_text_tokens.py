@@ -0,0 +1,11 @@
+from text_tokens import estimate_tokens, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Who wears #99 for the D-backs?") == [
+        "who", "wears", "99", "for", "the", "d", "backs"]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("Aaron Judge, #99") == 5
@@ -0,0 +1,156 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+import connections
+from database import (create_db, save_trivia_bank,
+                      get_random_banked_question, fetch_players)
+from synthetic_league import generate_league
+from trivia_question import (TriviaQuestion, get_random_trivia_question,
+                             generate_basic_questions)
+from trivia_bank import generate_team_questions, build_trivia_bank
+
+
+@pytest.fixture
+def roster():
+    return pd.DataFrame({
+        "name": [f"Player {i}" for i in range(6)],
+        "headshot_url": [f"https://example.com/{i}.jpg" for i in range(6)]
+    })
+
+
+def basic_questions(player):
+    return [TriviaQuestion(
+        question=f"What position does {player['name']} play?",
+        correct_answer="Pitcher",
+        choices=["Pitcher", "Catcher", "Shortstop", "First Base"]
+    )]
+
+
+@patch("trivia_bank.generate_basic_questions", side_effect=basic_questions)
+@patch("trivia_question.cached_players_by_team_id")
+@patch("trivia_bank.get_players_by_team_id")
+def test_generate_team_questions(mock_bank_players, mock_players,
+                                 mock_basic, roster):
+    mock_bank_players.return_value = roster
+    mock_players.return_value = roster
+
+    bank = generate_team_questions(1, per_team=10)
+
+    assert len(bank) == 10
+    assert len({(q["question"], q["correct_answer"]) for q in bank}) == 10
+    for q in bank:
+        assert q["correct_answer"] in q["choices"]
+
+
+@patch("trivia_bank.generate_team_questions")
+@patch("trivia_bank.get_all_teams")
+def test_build_trivia_bank(mock_teams, mock_generate, tmp_path):
+    conn = create_db(tmp_path / "mlb.db")
+    mock_teams.return_value = pd.DataFrame({"id": [1, 2]})
+    mock_generate.side_effect = lambda team_id, per_team: [{
+        "question": f"Q for {team_id}", "correct_answer": "A",
+        "choices": ["A", "B", "C", "D"], "image_url": None
+    }]
+
+    assert build_trivia_bank(conn, per_team=5) == {1: 1, 2: 1}
+    assert get_random_banked_question(2, conn=conn)["question"] == "Q for 2"
+    conn.close()
+
+
+def test_banked_question_round_trip(tmp_path):
+    conn = create_db(tmp_path / "mlb.db")
+    questions = [{
+        "question": f"Q{i}", "correct_answer": "A",
+        "choices": ["A", "B", "C", "D"], "image_url": "img"
+    } for i in range(5)]
+    save_trivia_bank(conn, 1, questions)
+    # rebuilding replaces the old bank rather than adding to it
+    save_trivia_bank(conn, 1, questions)
+
+    picked = {get_random_banked_question(1, conn=conn)["question"]
+              for _ in range(100)}
+    assert picked <= {f"Q{i}" for i in range(5)}
+    assert get_random_banked_question(2, conn=conn) is None
+    assert conn.execute(
+        "SELECT COUNT(*) FROM trivia_questions").fetchone()[0] == 5
+    conn.close()
+
+
+def test_banked_question_by_slot_uses_the_index(tmp_path):
+    conn = create_db(tmp_path / "mlb.db")
+    save_trivia_bank(conn, 1, [{
+        "question": f"Q{i}", "correct_answer": "A",
+        "choices": ["A", "B", "C", "D"], "image_url": None
+    } for i in range(3)])
+    statements = []
+    conn.set_trace_callback(statements.append)
+    get_random_banked_question(1, conn=conn)
+    conn.set_trace_callback(None)
+
+    # a count and one row, both read through the slot index
+    assert len(statements) == 2
+    for statement in statements:
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN " + statement))
+        assert "idx_trivia_team_slot" in plan
+    conn.close()
+
+
+def statements_run(func, *args):
+    """The SQL statements func runs on this thread's read connection."""
+    statements = []
+    conn = connections.get_read_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        func(*args)
+    finally:
+        conn.set_trace_callback(None)
+    return statements
+
+
+def test_banked_questions_come_from_the_cache(tmp_path):
+    conn = create_db(tmp_path / "mlb.db")
+    save_trivia_bank(conn, 1, [{
+        "question": f"Q{i}", "correct_answer": "A",
+        "choices": ["A", "B", "C", "D"], "image_url": None
+    } for i in range(3)])
+    conn.close()
+    connections.configure(db_path=tmp_path / "mlb.db")
+
+    get_random_trivia_question(1)
+    for _ in range(20):
+        assert statements_run(get_random_trivia_question, 1) == []
+    # shuffling a question's choices leaves the cached bank as it was
+    for _ in range(20):
+        assert get_random_banked_question(1)["choices"] == [
+            "A", "B", "C", "D"]
+
+
+def test_profiles_come_from_the_cache(tmp_path):
+    generate_league(tmp_path / "league.db", n_teams=5, players_per_team=5)
+    connections.configure(db_path=tmp_path / "league.db")
+    players = [dict(row) for row in fetch_players(2)]
+
+    # the first pass loads the caches
+    assert all(generate_basic_questions(player) for player in players)
+    for player in players:
+        assert statements_run(generate_basic_questions, player) == []
+
+
+@patch("trivia_question.get_random_banked_question")
+def test_random_question_served_from_bank(mock_banked):
+    mock_banked.return_value = {
+        "question": "Who is this player?", "correct_answer": "A",
+        "choices": ["A", "B", "C", "D"], "image_url": None
+    }
+    q = get_random_trivia_question(1)
+    assert isinstance(q, TriviaQuestion)
+    assert q.question == "Who is this player?"
+    assert sorted(q.choices) == ["A", "B", "C", "D"]
+
+
+@patch("trivia_question.generate_random_trivia_question")
+@patch("trivia_question.get_random_banked_question", return_value=None)
+def test_random_question_falls_back_to_live(mock_banked, mock_live):
+    get_random_trivia_question(7)
+    mock_live.assert_called_once_with(7)
@@ -1,7 +1,7 @@
 import pytest
 import streamlit as st
 from unittest.mock import MagicMock
-import trivia_question
+import trivia_game
 
 
 # Fixtures
@@ -14,8 +14,7 @@ def reset_streamlit_session():
 
 @pytest.fixture
 def mock_get_random_trivia_question(monkeypatch):
-    """Patch trivia.get_random_trivia_question before \
-        TriviaGame is imported."""
+    """Patch the get_random_trivia_question TriviaGame calls."""
     def _mock(team_id):
         q = MagicMock()
         q.is_correct.side_effect = lambda answer: answer == "42"
@@ -25,15 +24,14 @@ def mock_get_random_trivia_question(monkeypatch):
         return q
 
     # Monkeypatching the function to return the mock instead of calling the API
-    monkeypatch.setattr(trivia_question, "get_random_trivia_question", _mock)
+    monkeypatch.setattr(trivia_game, "get_random_trivia_question", _mock)
 
 
 @pytest.fixture
 def game(mock_get_random_trivia_question):
     """Create a TriviaGame instance after mocking is in place."""
-    from trivia_game import TriviaGame  # Delay import until after monkeypatch
     st.session_state["selected_team"] = 1
-    tg = TriviaGame(team_id=1)
+    tg = trivia_game.TriviaGame(team_id=1)
     return tg
 
 
@@ -104,3 +102,38 @@ def test_finalize_status_bases(game):
         st.session_state["bases"] = bases
         game.finalize_status()
         assert st.session_state["status"] == expected_status
+
+
+def test_next_question_is_prefetched(monkeypatch):
+    """The next pitch is built in the background and used by new_question."""
+    calls = []
+
+    def _fake(team_id):
+        calls.append(team_id)
+        return f"question {len(calls)}"
+
+    monkeypatch.setattr(trivia_game, "get_random_trivia_question", _fake)
+    tg = trivia_game.TriviaGame(team_id=3)
+    assert st.session_state[tg.question_key] == "question 1"
+
+    future = st.session_state[tg.prefetch_key]
+    assert future.result() == "question 2"
+
+    tg.new_question()
+    assert st.session_state[tg.question_key] == "question 2"
+    assert tg.prefetch_key not in st.session_state
+    assert len(calls) == 2
+
+
+def test_prefetch_failure_falls_back(monkeypatch):
+    """A failed prefetch is replaced by building the question directly."""
+    from concurrent.futures import Future
+
+    monkeypatch.setattr(trivia_game, "get_random_trivia_question",
+                        lambda team_id: "fresh question")
+    failed = Future()
+    failed.set_exception(RuntimeError("api down"))
+    st.session_state["prefetch_4"] = failed
+
+    tg = trivia_game.TriviaGame(team_id=4)
+    assert st.session_state[tg.question_key] == "fresh question"
@@ -32,15 +32,16 @@ def team_players_data():
 
 @pytest.fixture
 def mock_functions(mocker):
-    mocker.patch("api.get_player_info", return_value={
+    mocker.patch("trivia_question.get_player_info", return_value={
         "strNationality": "USA",
         "dateBorn": "1992-10-07",
         "strPosition": "Outfielder",
         "idPlayer": 123
     })
-    mocker.patch("api.get_player_teams", return_value=[
+    mocker.patch("trivia_question.get_player_teams", return_value=[
                  {"former_team": "Red Sox"}])
-    mocker.patch("api.get_player_honors", return_value=[{"honour": "MVP"}])
+    mocker.patch("trivia_question.get_player_honors",
+                 return_value=[{"honour": "MVP"}])
     mocker.patch("database.get_all_teams", return_value=pd.DataFrame({
         "name": ["Red Sox", "Dodgers", "Giants", "Yankees", "Mets"]
     }))
@@ -117,10 +118,10 @@ def test_generate_basic_questions_correct_answer_in_choices(player_data,
         assert_correct_answer_in_choices(q)
 
 
-@patch("trivia_question.get_players_by_team_id")
-def test_generate_who_is_this_question_4_players(mock_get_players_by_team_id,
+@patch("trivia_question.cached_players_by_team_id")
+def test_generate_who_is_this_question_4_players(mock_get_players,
                                                  team_players_data):
-    mock_get_players_by_team_id.return_value = team_players_data
+    mock_get_players.return_value = team_players_data
     result = generate_who_is_this_question(1)
     assert isinstance(result, TriviaQuestion)
     assert result.question == "Who is this player?"
@@ -128,12 +129,12 @@ def test_generate_who_is_this_question_4_players(mock_get_players_by_team_id,
     assert result.correct_answer in result.choices
 
 
-@patch("trivia_question.get_players_by_team_id")
+@patch("trivia_question.cached_players_by_team_id")
 @patch("random.choices")
 def test_get_random_trivia_question(
-    mock_random_choices, mock_get_players_by_team_id, team_players_data
+    mock_random_choices, mock_get_players, team_players_data
 ):
-    mock_get_players_by_team_id.return_value = team_players_data
+    mock_get_players.return_value = team_players_data
     mock_random_choices.return_value = [generate_who_is_this_question]
 
     result = get_random_trivia_question(1)
@@ -0,0 +1,107 @@
+from unittest.mock import patch, MagicMock
+from ttl_cache import TTLCache, MISSING
+from api import get_player_info, get_player_honors
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_and_set():
+    cache = TTLCache(":memory:")
+    assert cache.get("k") is MISSING
+    cache.set("k", {"a": [1, 2]}, ttl=60)
+    assert cache.get("k") == {"a": [1, 2]}
+
+
+def test_none_is_a_cacheable_value():
+    cache = TTLCache(":memory:")
+    cache.set("k", None, ttl=60)
+    assert cache.get("k") is None
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(":memory:", clock=clock)
+    cache.set("k", "v", ttl=10)
+    clock.now += 11
+    assert cache.get("k") is MISSING
+
+
+def test_survives_restart_through_disk(tmp_path):
+    db_path = tmp_path / "cache.db"
+    TTLCache(db_path).set("k", "v", ttl=60)
+    assert TTLCache(db_path).get("k") == "v"
+
+
+def test_memory_tier_is_lru():
+    cache = TTLCache(":memory:", memory_size=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert list(cache.memory) == ["a", "c"]
+    # evicted from memory but still on disk
+    assert cache.get("b") == 2
+
+
+def test_purge_expired_and_clear():
+    clock = FakeClock()
+    cache = TTLCache(":memory:", clock=clock)
+    cache.set("old", 1, ttl=1)
+    cache.set("new", 2, ttl=100)
+    clock.now += 10
+    cache.purge_expired()
+    rows = cache.conn.execute("SELECT key FROM cache").fetchall()
+    assert rows == [("new",)]
+    cache.clear()
+    assert cache.get("new") is MISSING
+
+
+def make_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+@patch('http_client.get')
+def test_api_calls_are_cached(mock_get):
+    mock_get.return_value = make_response({"player": [{
+        "idPlayer": "1", "strSport": "Baseball"
+    }]})
+    assert get_player_info("John Doe")["idPlayer"] == "1"
+    assert get_player_info("John Doe")["idPlayer"] == "1"
+    mock_get.assert_called_once()
+
+
+@patch('http_client.get')
+def test_not_found_is_cached_for_less_time(mock_get, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("api._cache", TTLCache(":memory:", clock=clock))
+    mock_get.return_value = make_response({"honours": None})
+
+    assert get_player_honors("1") == []
+    assert get_player_honors("1") == []
+    assert mock_get.call_count == 1
+
+    clock.now += 7 * 3600
+    assert get_player_honors("1") == []
+    assert mock_get.call_count == 2
+
+
+def test_max_entries_evicts_soonest_to_expire():
+    clock = FakeClock()
+    cache = TTLCache(":memory:", clock=clock, max_entries=2)
+    cache.set("long", 1, ttl=300)
+    cache.set("short", 2, ttl=10)
+    cache.set("middle", 3, ttl=100)
+
+    assert cache.get("short") is MISSING
+    assert cache.get("long") == 1
+    assert cache.get("middle") == 3
+    count = cache.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    assert count == 2
@@ -0,0 +1,217 @@
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import openai
+import pytest
+from ai import ask_model
+from ump_tools import run_tool, resolve_team
+
+
+def call(name, **arguments):
+    return json.loads(run_tool(name, json.dumps(arguments)))
+
+
+def test_lookup_team(league):
+    assert call("lookup_team", team="yankees") == {
+        "team": "New York Yankees", "stadium": "Yankee Stadium",
+        "address": "1 E 161st St Bronx", "phone": "(718) 293-4300"}
+    assert call("lookup_team", team="White Sox")["phone"] is None
+
+
+def test_ambiguous_and_unknown_teams(league):
+    assert resolve_team("Sox") == {
+        "error": "More than one team matches 'Sox'",
+        "teams": ["Boston Red Sox", "Chicago White Sox"]}
+    assert call("list_roster", team="Dodgers") == {
+        "error": "No team called 'Dodgers'"}
+
+
+def test_list_roster(league):
+    assert call("list_roster", team="Red Sox") == {
+        "team": "Boston Red Sox",
+        "players": [{"name": "Rafael Devers", "jersey_number": "11"},
+                    {"name": "Trevor Story", "jersey_number": None}],
+        "total_players": 2}
+
+
+def test_find_player_by_jersey(league):
+    assert call("find_player_by_jersey", number=11)["players"] == [
+        {"name": "Rafael Devers", "team": "Boston Red Sox"},
+        {"name": "Anthony Volpe", "team": "New York Yankees"}]
+    assert call("find_player_by_jersey", number=11,
+                team="Yankees")["players"] == [
+        {"name": "Anthony Volpe", "team": "New York Yankees"}]
+
+
+def test_get_stadium(league):
+    assert call("get_stadium", team="Boston") == {
+        "team": "Boston Red Sox", "stadium": "Fenway Park",
+        "address": "4 Jersey Street Boston"}
+
+
+def test_bad_calls_are_errors_not_exceptions(league):
+    assert "Unknown tool" in call("drop_tables")["error"]
+    assert "Bad arguments" in call("get_stadium", stadium="Fenway")["error"]
+    assert "Bad arguments" in json.loads(
+        run_tool("lookup_team", "{not json"))["error"]
+    assert "Bad arguments" in call("find_player_by_jersey",
+                                   number="ninety")["error"]
+
+
+@pytest.mark.parametrize("name,arguments", [
+    ("lookup_team", {"team": 5}),
+    ("list_roster", {"team": None}),
+    ("get_stadium", {}),
+    ("find_player_by_jersey", {"number": 10 ** 30}),
+    ("find_player_by_jersey", {"number": 1.5}),
+    ("find_player_by_jersey", {"number": True}),
+    ("find_player_by_jersey", {"number": 100}),
+    ("find_player_by_jersey", {"number": "11"}),
+    ("find_player_by_jersey", {"number": 11, "team": ["Yankees"]}),
+])
+def test_arguments_are_checked_against_the_schema(league, name, arguments):
+    assert call(name, **arguments)["error"].startswith(
+        f"Bad arguments for {name}")
+
+
+def test_optional_team_may_be_null(league):
+    assert call("find_player_by_jersey", number=99,
+                team=None)["players"] == [
+        {"name": "Aaron Judge", "team": "New York Yankees"}]
+    assert json.loads(run_tool("lookup_team", "[1, 2]"))["error"] == (
+        "Bad arguments for lookup_team: arguments must be a JSON object")
+
+
+def test_database_errors_are_returned(league, mocker):
+    mocker.patch("database.fetch_players",
+                 side_effect=sqlite3.OperationalError("disk I/O error"))
+    assert call("list_roster", team="Yankees") == {
+        "error": "list_roster failed: disk I/O error"}
+
+
+"""Tool calls through the openai client and a stand-in completions API"""
+
+
+def completion(message):
+    return {"id": "c", "object": "chat.completion", "created": 0,
+            "model": "gpt", "choices": [{"index": 0, "message": message,
+                                         "finish_reason": "stop"}]}
+
+
+def tool_call(call_id, name, arguments):
+    return {"id": call_id, "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def chunk(delta):
+    return {"id": "c", "object": "chat.completion.chunk", "created": 0,
+            "model": "gpt", "choices": [{"index": 0, "delta": delta,
+                                         "finish_reason": None}]}
+
+
+class CompletionsHandler(BaseHTTPRequestHandler):
+    """Records each request and answers with the next canned reply."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(
+            int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        reply = self.server.replies.pop(0)
+        if body.get("stream"):
+            # server-sent events, one per chunk
+            payload = "".join(f"data: {json.dumps(part)}\n\n"
+                              for part in reply) + "data: [DONE]\n\n"
+            content_type = "text/event-stream"
+        else:
+            payload = json.dumps(reply)
+            content_type = "application/json"
+        payload = payload.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def completions():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionsHandler)
+    server.requests = []
+    server.replies = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.client = openai.OpenAI(
+        api_key="test", max_retries=0,
+        base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_tool_loop(league, completions):
+    completions.replies = [
+        completion({"role": "assistant", "content": None, "tool_calls": [
+            tool_call("1", "find_player_by_jersey",
+                      {"number": 99, "team": "Yankees"}),
+            tool_call("2", "get_stadium", {"team": "Yankees"})]}),
+        completion({"role": "assistant",
+                    "content": "Aaron Judge, at Yankee Stadium."}),
+    ]
+    question = [{"role": "user", "content": "Who wears 99 for NY?"}]
+
+    reply = "".join(ask_model(completions.client, "gpt", question))
+
+    assert reply == "Aaron Judge, at Yankee Stadium."
+    first, second = completions.requests
+    assert first["tool_choice"] == "auto"
+    assert len(first["tools"]) == 4
+    call_message, judge, stadium = second["messages"][1:]
+    assert [call["id"] for call in call_message["tool_calls"]] == ["1", "2"]
+    assert judge["tool_call_id"] == "1"
+    assert json.loads(judge["content"])["players"] == [
+        {"name": "Aaron Judge", "team": "New York Yankees"}]
+    assert json.loads(stadium["content"])["stadium"] == "Yankee Stadium"
+
+
+def test_streamed_tool_loop(league, completions):
+    # the call's arguments arrive in pieces, as they do from the API
+    completions.replies = [
+        [chunk({"role": "assistant", "tool_calls": [
+            {"index": 0, "id": "1", "type": "function",
+             "function": {"name": "list_roster", "arguments": ""}}]}),
+         chunk({"tool_calls": [{"index": 0,
+                                "function": {"arguments": '{"team": '}}]}),
+         chunk({"tool_calls": [{"index": 0,
+                                "function": {"arguments": '"Red Sox"}'}}]})],
+        [chunk({"role": "assistant", "content": "Devers "}),
+         chunk({"content": "and Story."})],
+    ]
+    question = [{"role": "user", "content": "Who is on the Sox?"}]
+
+    parts = list(ask_model(completions.client, "gpt", question, stream=True))
+
+    assert parts == ["Devers ", "and Story."]
+    roster = json.loads(completions.requests[1]["messages"][-1]["content"])
+    assert [player["name"] for player in roster["players"]] == [
+        "Rafael Devers", "Trevor Story"]
+
+
+def test_tool_loop_must_answer_after_max_rounds(league, completions):
+    ask_again = completion({"role": "assistant", "content": None,
+                            "tool_calls": [tool_call("1", "lookup_team",
+                                                     {"team": "Yankees"})]})
+    completions.replies = [ask_again, ask_again,
+                           completion({"role": "assistant",
+                                       "content": "The Bronx."})]
+    question = [{"role": "user", "content": "Where are the Yankees?"}]
+
+    reply = "".join(ask_model(completions.client, "gpt", question,
+                              max_rounds=2))
+
+    assert reply == "The Bronx."
+    assert [request["tool_choice"] for request in completions.requests] == [
+        "auto", "auto", "none"]
@@ -0,0 +1,14 @@
+# This module splits text into words and estimates its LLM token count
+import re
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower case words and numbers."""
+    return _WORD.findall(str(text).lower())
+
+
+def estimate_tokens(text):
+    """Rough LLM token count, about four characters a token."""
+    return len(text) // 4 + 1
@@ -1,6 +1,7 @@
 import random
 import streamlit as st
-from database import get_team_by_id, get_players_by_team_id, get_all_teams
+from database import (get_team_by_id, cached_players_by_team_id,
+                      cached_all_teams)
 from api import get_player_info, get_player_teams, get_player_honors
 
 
@@ -79,7 +80,7 @@ def generate_basic_questions(player_row):
         former = [t["former_team"] for t in teams if t.get("former_team")]
         if former:
             correct = former[0]
-            all_teams = get_all_teams()
+            all_teams = cached_all_teams()
             wrong = all_teams[all_teams["name"] != correct]["name"] \
                 .sample(3).tolist()
             questions.append(TriviaQuestion(
@@ -111,7 +112,7 @@ def generate_basic_questions(player_row):
 
 
 def generate_who_is_this_question(team_id):
-    df = get_players_by_team_id(team_id)
+    df = cached_players_by_team_id(team_id)
     if df.shape[0] < 4:
         return None
 
@@ -127,7 +128,7 @@ def generate_who_is_this_question(team_id):
 
 
 def get_random_trivia_question(team_id):
-    df = get_players_by_team_id(team_id)
+    df = cached_players_by_team_id(team_id)
     if df.empty:
         return None
 
@@ -0,0 +1,65 @@
+# This module pre-generates trivia questions for every team into the database
+import argparse
+import random
+from connections import writer
+from database import (create_tables, get_all_teams, get_players_by_team_id,
+                      save_trivia_bank)
+from trivia_question import (generate_basic_questions,
+                             generate_who_is_this_question)
+
+DEFAULT_PER_TEAM = 50
+
+
+def generate_team_questions(team_id, per_team=DEFAULT_PER_TEAM):
+    """
+    Build up to per_team distinct questions for a team: "who is this"
+    questions plus the basic questions for each player on the roster.
+    """
+    questions = {}
+
+    def add(q):
+        if q is not None and len(questions) < per_team:
+            questions.setdefault((q.question, q.correct_answer), q)
+
+    players = get_players_by_team_id(team_id)
+    for _, player in players.sample(frac=1).iterrows():
+        if len(questions) >= per_team:
+            break
+        for q in generate_basic_questions(player):
+            add(q)
+
+    # Fill what is left with picture questions, they need no api
+    attempts = 0
+    while len(questions) < per_team and attempts < per_team * 3:
+        add(generate_who_is_this_question(team_id))
+        attempts += 1
+
+    bank = [q.to_dict() for q in questions.values()]
+    random.shuffle(bank)
+    return bank
+
+
+def build_trivia_bank(conn, per_team=DEFAULT_PER_TEAM):
+    """Regenerate every team's bank. Returns {team_id: questions stored}."""
+    built = {}
+    for team_id in get_all_teams()["id"]:
+        team_id = int(team_id)
+        bank = generate_team_questions(team_id, per_team=per_team)
+        save_trivia_bank(conn, team_id, bank)
+        built[team_id] = len(bank)
+    return built
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pre-generate the trivia question bank")
+    parser.add_argument("--per-team", type=int, default=DEFAULT_PER_TEAM,
+                        help="questions to store for each team")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with writer() as conn:
+        create_tables(conn)
+        build_trivia_bank(conn, per_team=args.per_team)
@@ -1,7 +1,12 @@
 # This module contains a class and function for the Trivia Game
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from trivia_question import get_random_trivia_question
-from database import get_team_by_id
+from database import fetch_team
+
+# Questions for the next pitch are built here while the user answers
+_prefetch_pool = ThreadPoolExecutor(max_workers=4,
+                                    thread_name_prefix="trivia-prefetch")
 
 
 class TriviaGame:
@@ -15,14 +20,37 @@ class TriviaGame:
         self.question_key = f"trivia_question_{team_id}"
         self.submit_key = f"submitted_{team_id}"
         self.process_key = f"processed_{team_id}"
+        self.prefetch_key = f"prefetch_{team_id}"
         # start every game with a question
         if self.question_key not in st.session_state:
             self.new_question()
+        # and start on the next one while this one is answered
+        self.prefetch_next()
+
+    # Starts building the next pitch's question in the background
+
+    def prefetch_next(self):
+        # After the last pitch this becomes the next game's first question
+        if self.prefetch_key in st.session_state:
+            return
+        st.session_state[self.prefetch_key] = _prefetch_pool.submit(
+            get_random_trivia_question, int(self.team_id))
+
+    # Takes the prefetched question, or builds one now if there is none
+
+    def take_prefetched(self):
+        future = st.session_state.pop(self.prefetch_key, None)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                pass  # fall back to building it here
+        return get_random_trivia_question(int(self.team_id))
 
     # Function gets a question
 
     def new_question(self):
-        q = get_random_trivia_question(int(self.team_id))
+        q = self.take_prefetched()
         self.current_question = q
         st.session_state[self.question_key] = q
         # increment the "pitches" (questions) count
@@ -93,6 +121,8 @@ def new_game():
     if team_id:
         for suffix in ["trivia_question", "submitted", "processed"]:
             st.session_state.pop(f"{suffix}_{team_id}", None)
+        # a question prefetched for the old game is still fine to use
+        # for the new one, so the future is kept
 
 
 # Function to play the game
@@ -129,7 +159,7 @@ def st_game_play():
 
     with col1:
         st.markdown("## Play Ball!")
-        team = get_team_by_id(int(st.session_state['selected_team']))
+        team = fetch_team(int(st.session_state['selected_team']))
         st.markdown(f"##### Your team: {team['name']}")
         team_id = st.session_state['selected_team']
         question_key = f"trivia_question_{team_id}"
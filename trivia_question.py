@@ -1,6 +1,8 @@
 # This module creates a trivia question class and function
 import random
-from database import get_players_by_team_id, get_all_teams
+from database import (cached_players_by_team_id, cached_all_teams,
+                      cached_team_profiles, get_player_profile,
+                      get_random_banked_question)
 from api import get_player_info, get_player_teams, get_player_honors
 
 
@@ -30,8 +32,15 @@ class TriviaQuestion:
 
 def generate_basic_questions(player_row):
     name = player_row["name"]
-    # The first api
-    info = get_player_info(name)
+    # The stored profile from the enrichment job, else the first api
+    profile = None
+    if "id" in player_row and "team_id" in player_row:
+        # the whole team's profiles are cached, no query per question
+        profile = cached_team_profiles(player_row["team_id"]).get(
+            int(player_row["id"]))
+    elif "id" in player_row:
+        profile = get_player_profile(int(player_row["id"]))
+    info = profile["info"] if profile else get_player_info(name)
     if not info:
         return []
 
@@ -79,12 +88,15 @@ def generate_basic_questions(player_row):
         ))
 
     # Q4: Former Team
-    teams = get_player_teams(info["idPlayer"])
+    if profile:
+        teams = profile["former_teams"]
+    else:
+        teams = get_player_teams(info["idPlayer"])
     if teams:
         former = [t["former_team"] for t in teams if t.get("former_team")]
         if former:
             correct = former[0]
-            all_teams = get_all_teams()
+            all_teams = cached_all_teams()
             wrong = all_teams[all_teams["name"] != correct]["name"] \
                 .sample(3).tolist()
             questions.append(TriviaQuestion(
@@ -95,7 +107,10 @@ def generate_basic_questions(player_row):
             ))
 
     # Q5: Honors
-    honors = get_player_honors(info["idPlayer"])
+    if profile:
+        honors = profile["honors"]
+    else:
+        honors = get_player_honors(info["idPlayer"])
     if honors:
         honor_obj = honors[0]
         honor = honor_obj.get("honour")
@@ -118,7 +133,7 @@ def generate_basic_questions(player_row):
 
 
 def generate_who_is_this_question(team_id):
-    df = get_players_by_team_id(team_id)
+    df = cached_players_by_team_id(team_id)
     if df.shape[0] < 4:
         return None
 
@@ -134,16 +149,31 @@ def generate_who_is_this_question(team_id):
 
 
 def get_random_trivia_question(team_id):
-    df = get_players_by_team_id(team_id)
+    # Serve from the pre-generated bank when there is one
+    banked = get_random_banked_question(team_id)
+    if banked:
+        return TriviaQuestion(**banked)
+
+    return generate_random_trivia_question(team_id)
+
+
+# Build a question on demand (live api calls for the basic questions)
+
+
+def generate_random_trivia_question(team_id):
+    df = cached_players_by_team_id(team_id)
     if df.empty:
         return None
 
     player = df.sample(1).iloc[0]
 
+    def basic_question():
+        questions = generate_basic_questions(player)
+        return random.choice(questions) if questions else None
+
     question_types = [
         lambda: generate_who_is_this_question(team_id),
-        lambda: random.choice(generate_basic_questions(player))
-        if generate_basic_questions(player) else None,
+        basic_question,
     ]
 
     random.shuffle(question_types)
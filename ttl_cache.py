@@ -0,0 +1,103 @@
+# This module is a small two-tier cache: an in-memory LRU over SQLite
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by get() when a key is missing or expired (None is a valid value)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Key/value cache where every entry has its own time to live.
+    Values must be JSON serializable. The most recently used entries are
+    also kept in memory so repeat lookups never touch the disk. With
+    max_entries the entries closest to expiring are dropped once the
+    cache holds more than that.
+    """
+
+    def __init__(self, db_path, memory_size=512, clock=time.time,
+                 max_entries=None):
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.clock = clock
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires "
+                          "ON cache (expires_at)")
+        self.conn.commit()
+
+    def _remember(self, key, value, expires_at):
+        self.memory[key] = (value, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        now = self.clock()
+        with self.lock:
+            if key in self.memory:
+                value, expires_at = self.memory[key]
+                if expires_at > now:
+                    self.memory.move_to_end(key)
+                    return value
+                del self.memory[key]
+
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return MISSING
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return value
+
+    def set(self, key, value, ttl):
+        expires_at = self.clock() + ttl
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            if self.max_entries is not None:
+                self._evict()
+            self.conn.commit()
+            self._remember(key, value, expires_at)
+
+    def _evict(self):
+        # Expired rows go first, then the soonest to expire
+        count = self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        evicted = self.conn.execute("""
+            DELETE FROM cache WHERE key IN
+                (SELECT key FROM cache ORDER BY expires_at LIMIT ?)
+            RETURNING key
+        """, (excess,)).fetchall()
+        for (key,) in evicted:
+            self.memory.pop(key, None)
+
+    def purge_expired(self):
+        """Delete expired rows from disk."""
+        with self.lock:
+            self.conn.execute("DELETE FROM cache WHERE expires_at <= ?",
+                              (self.clock(),))
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.conn.execute("DELETE FROM cache")
+            self.conn.commit()
@@ -0,0 +1,184 @@
+# This module is the Ump's tool set: database lookups the model can call
+import json
+import sqlite3
+import database
+from intent_router import find_team
+
+# Longest list of players a tool hands back to the model
+MAX_PLAYERS = 60
+
+
+def _function(name, description, properties, required):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": properties,
+                           "required": required}
+        }
+    }
+
+
+_TEAM = {"type": "string",
+         "description": "Team name or nickname, e.g. \"Red Sox\""}
+
+# The tools as the chat completions API expects them
+TOOLS = [
+    _function("lookup_team",
+              "Find an MLB team by name: its full name, stadium, address "
+              "and phone number.",
+              {"team": _TEAM}, ["team"]),
+    _function("list_roster",
+              "The players on a team's roster with their jersey numbers.",
+              {"team": _TEAM}, ["team"]),
+    _function("find_player_by_jersey",
+              "Who wears a jersey number, on one team or across the league.",
+              {"number": {"type": "integer", "minimum": 0, "maximum": 99,
+                          "description": "0 to 99"},
+               "team": dict(_TEAM, description="Optional team to look in")},
+              ["number"]),
+    _function("get_stadium",
+              "A team's stadium, its address and (if known) coordinates.",
+              {"team": _TEAM}, ["team"]),
+]
+
+
+"""Find the Team a tool was asked about"""
+
+
+def resolve_team(team):
+    """
+    The team's row, or an error dict for the model. Nicknames are
+    matched like the intent router does, then any team whose name
+    contains the text.
+    """
+    team_id = find_team(team)
+    if team_id is not None:
+        return database.fetch_team(team_id)
+    matches = database.search_teams(team) if team.strip() else []
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        return {"error": f"More than one team matches {team!r}",
+                "teams": [row["name"] for row in matches]}
+    return {"error": f"No team called {team!r}"}
+
+
+"""The Tools"""
+
+
+def lookup_team(team):
+    row = resolve_team(team)
+    if isinstance(row, dict):
+        return row
+    phone = (row["phone"] or "").replace("Phone:", "").strip()
+    return {"team": row["name"], "stadium": row["stadium"],
+            "address": row["stadium_addr"], "phone": phone or None}
+
+
+def list_roster(team):
+    row = resolve_team(team)
+    if isinstance(row, dict):
+        return row
+    players = database.fetch_players(row["id"])
+    return {
+        "team": row["name"],
+        "players": [{"name": player["name"],
+                     "jersey_number": player["jersey_number"] or None}
+                    for player in players[:MAX_PLAYERS]],
+        "total_players": len(players)
+    }
+
+
+def find_player_by_jersey(number, team=None):
+    team_id = None
+    if team:
+        row = resolve_team(team)
+        if isinstance(row, dict):
+            return row
+        team_id = row["id"]
+    players = database.fetch_players_by_jersey(number, team_id)
+    return {
+        "number": number,
+        "players": [{"name": player["name"], "team": player["team_name"]}
+                    for player in players[:MAX_PLAYERS]],
+        "total_players": len(players)
+    }
+
+
+def get_stadium(team):
+    row = resolve_team(team)
+    if isinstance(row, dict):
+        return row
+    stadium = {"team": row["name"], "stadium": row["stadium"],
+               "address": row["stadium_addr"]}
+    # only databases that have been geocoded have coordinates
+    if "latitude" in row.keys() and row["latitude"] is not None:
+        stadium["latitude"] = row["latitude"]
+        stadium["longitude"] = row["longitude"]
+    return stadium
+
+
+_HANDLERS = {
+    "lookup_team": lookup_team,
+    "list_roster": list_roster,
+    "find_player_by_jersey": find_player_by_jersey,
+    "get_stadium": get_stadium,
+}
+
+
+# JSON schema types and the Python types that satisfy them
+_TYPES = {"string": str, "integer": int}
+
+
+def check_arguments(name, kwargs):
+    """
+    Raise ValueError unless kwargs fit the tool's parameters: known
+    names, every required one given and each of its schema type (and
+    range). An optional parameter may be null.
+    """
+    if not isinstance(kwargs, dict):
+        raise ValueError("arguments must be a JSON object")
+    parameters = next(tool["function"]["parameters"] for tool in TOOLS
+                      if tool["function"]["name"] == name)
+    properties = parameters["properties"]
+    for key in parameters["required"]:
+        if kwargs.get(key) is None:
+            raise ValueError(f"{key!r} is required")
+    for key, value in kwargs.items():
+        if key not in properties:
+            raise ValueError(f"unexpected argument {key!r}")
+        schema = properties[key]
+        if value is None and key not in parameters["required"]:
+            continue
+        expected = _TYPES[schema["type"]]
+        # JSON true/false load as bools, which Python counts as ints
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError(f"{key!r} must be a {schema['type']}, "
+                             f"not {value!r}")
+        if "minimum" in schema and not (
+                schema["minimum"] <= value <= schema["maximum"]):
+            raise ValueError(f"{key!r} must be from {schema['minimum']} "
+                             f"to {schema['maximum']}, not {value!r}")
+
+
+def run_tool(name, arguments):
+    """
+    Run one tool call from the model and return its result as JSON.
+    Unknown tools and bad arguments come back as an error for the model
+    to read, they never raise.
+    """
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return json.dumps({"error": f"Unknown tool {name!r}"})
+    try:
+        kwargs = json.loads(arguments or "{}")
+        check_arguments(name, kwargs)
+    except ValueError as e:
+        return json.dumps({"error": f"Bad arguments for {name}: {e}"})
+    try:
+        result = handler(**kwargs)
+    except (sqlite3.Error, OverflowError) as e:
+        result = {"error": f"{name} failed: {e}"}
+    return json.dumps(result)